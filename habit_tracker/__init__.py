@@ -8,7 +8,23 @@ __version__ = "1.0.0"
 __author__ = "Ahmed Gamal"
 __email__ = "your.email@example.com"
 
-from habit_tracker.core.models import Habit, Completion, Periodicity
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from habit_tracker.core.models import Habit, Completion, Periodicity
 
 __all__ = ["Habit", "Completion", "Periodicity"]
 
+
+def __getattr__(name):
+    """
+    Resolve the model re-exports on first access.
+    
+    Importing the models pulls in SQLAlchemy, so it is deferred until one of
+    them is actually requested instead of running on every package import.
+    """
+    if name in __all__:
+        from habit_tracker.core import models
+        return getattr(models, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -8,17 +8,56 @@ to interact with the habit tracking system.
 
 import click
 from datetime import datetime
+from functools import update_wrapper
 from typing import Optional
 
-from ..core.models import Periodicity
-from ..core.database import db_manager
 from ..core.exceptions import (
     HabitNotFoundError,
     HabitAlreadyExistsError,
     HabitAlreadyCompletedError
 )
-from ..services.habit_service import HabitService
-from ..services import analytics_service as analytics
+
+# Periodicity values accepted on the command line. Plain strings (the values
+# of the Periodicity members), so building the commands does not import the
+# models, and SQLAlchemy with them
+_DAILY_STR = "daily"
+_PERIODICITY_CHOICES = [_DAILY_STR, "weekly"]
+
+# Maps CLI periodicity choices to enum members; filled on first lookup
+_PERIOD_MAP = {}
+
+
+def _to_periodicity(choice: str):
+    """Return the Periodicity member for a CLI periodicity choice."""
+    if not _PERIOD_MAP:
+        from ..core.models import Periodicity
+        _PERIOD_MAP.update((member.value, member) for member in Periodicity)
+    return _PERIOD_MAP[choice.lower()]
+
+
+def requires_db(f):
+    """
+    Initialize the database before running a command.
+    
+    Also opens one transactional session shared by every service call of the
+    command and stores it as the context object, so commands can receive it
+    via ``click.pass_obj``; it is committed when the click context closes.
+    Commands report their own errors, so their error branches roll the
+    session back first; otherwise that closing commit would fail on a
+    transaction left broken by a failed flush.
+    Help pages and ``--version`` never reach a decorated command, so they do
+    not touch the database.
+    """
+    @click.pass_context
+    def new_func(ctx: click.Context, *args, **kwargs):
+        # Imported here so that informational paths do not pay for SQLAlchemy
+        from ..core.database import db_manager
+        
+        db_manager.init_db()
+        ctx.obj = ctx.with_resource(db_manager.session_scope())
+        return f(*args, **kwargs)
+    
+    return update_wrapper(new_func, f)
 
 
 @click.group()
@@ -29,26 +68,30 @@ def cli():
     
     Use this tool to create habits, mark them as complete, and analyze your progress.
     """
-    # Initialize database on startup
-    db_manager.init_db()
+    pass
 
 
 @cli.command()
 @click.option('--name', prompt='Enter habit name', help='Name of the habit')
 @click.option('--description', help='Description of the habit (optional)')
 @click.option('--periodicity', 
-              type=click.Choice(['daily', 'weekly'], case_sensitive=False),
+              type=click.Choice(_PERIODICITY_CHOICES, case_sensitive=False),
               prompt='Enter periodicity (daily/weekly)', 
               help='How often the habit should be performed')
-def create(name: str, description: Optional[str], periodicity: str):
+@requires_db
+@click.pass_obj
+def create(session, name: str, description: Optional[str], periodicity: str):
     """Create a new habit to track."""
+    from ..services.habit_service import HabitService
+    
     try:
-        period_enum = Periodicity.DAILY if periodicity.lower() == 'daily' else Periodicity.WEEKLY
+        period_enum = _to_periodicity(periodicity)
         
         habit = HabitService.create_habit(
             name=name.strip(),
             description=description.strip() if description else None,
-            periodicity=period_enum
+            periodicity=period_enum,
+            session=session
         )
         
         click.echo(click.style(
@@ -57,60 +100,75 @@ def create(name: str, description: Optional[str], periodicity: str):
         ))
         
     except HabitAlreadyExistsError as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error: {e}", fg='red'))
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Unexpected error: {e}", fg='red'))
 
 
 @cli.command()
 @click.argument('habit_name')
-def complete(habit_name: str):
+@requires_db
+@click.pass_obj
+def complete(session, habit_name: str):
     """Mark a habit as completed for the current period."""
+    from ..services.habit_service import HabitService
+    
     try:
-        HabitService.log_completion(habit_name)
-        habit = HabitService.get_habit_by_name(habit_name)
+        completion = HabitService.log_completion(habit_name, session=session)
+        habit = completion.habit
         
-        period_name = "today" if habit.periodicity == Periodicity.DAILY else "this week"
+        daily = habit.periodicity is _to_periodicity(_DAILY_STR)
+        period_name = "today" if daily else "this week"
         
         click.echo(click.style(
             f"✅ Habit '{habit_name}' marked as complete for {period_name}!",
             fg='green'
         ))
         
-        # Show current streak
-        completions = HabitService.get_completions_for_habit(habit.id)
-        current_streak = analytics.calculate_streak(completions, habit.periodicity)
+        # Show current streak; computed in SQL over recent completions only
+        current_streak = habit.get_current_streak(session=session)
         
         if current_streak > 1:
-            streak_unit = "days" if habit.periodicity == Periodicity.DAILY else "weeks"
+            streak_unit = "days" if daily else "weeks"
             click.echo(click.style(
                 f"🔥 Current streak: {current_streak} {streak_unit}",
                 fg='yellow'
             ))
         
     except HabitNotFoundError as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error: {e}", fg='red'))
     except HabitAlreadyCompletedError as e:
+        session.rollback()
         click.echo(click.style(f"⚠️  {e}", fg='yellow'))
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Unexpected error: {e}", fg='red'))
 
 
 @cli.command()
 @click.argument('habit_name')
 @click.confirmation_option(prompt='Are you sure you want to delete this habit and all its data?')
-def delete(habit_name: str):
+@requires_db
+@click.pass_obj
+def delete(session, habit_name: str):
     """Delete a habit and all its completion data."""
+    from ..services.habit_service import HabitService
+    
     try:
-        HabitService.delete_habit(habit_name)
+        HabitService.delete_habit(habit_name, session=session)
         click.echo(click.style(
             f"✅ Habit '{habit_name}' and all its completion data deleted successfully!",
             fg='green'
         ))
         
     except HabitNotFoundError as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error: {e}", fg='red'))
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Unexpected error: {e}", fg='red'))
 
 
@@ -121,17 +179,24 @@ def analyze():
 
 
 @analyze.command('list-all')
-def list_all_habits():
+@requires_db
+@click.pass_obj
+def list_all_habits(session):
     """List all currently tracked habits."""
+    from ..services import analytics_service as analytics
+    
     try:
-        stats = analytics.get_all_habits_statistics()
+        stats = analytics.get_all_habits_statistics(session=session)
         
         if not stats:
             click.echo(click.style("📝 No habits found. Create your first habit with 'create' command!", fg='yellow'))
             return
         
-        click.echo(click.style("\n📊 All Tracked Habits:", fg='blue', bold=True))
-        click.echo("-" * 50)
+        # Collect every line and write them in one echo call
+        lines = [
+            click.style("\n📊 All Tracked Habits:", fg='blue', bold=True),
+            "-" * 50,
+        ]
         
         for stat in stats:
             # Format creation date
@@ -140,13 +205,13 @@ def list_all_habits():
             # Create status indicators
             streak_emoji = "🔥" if stat['current_streak'] > 0 else "💤"
             
-            click.echo(f"• ID: {stat.get('habit_id', 'N/A')}")
-            click.echo(f"  Name: {stat['habit_name']}")
-            click.echo(f"  Periodicity: {stat['periodicity']}")
-            click.echo(f"  Created: {created_date}")
-            click.echo(f"  {streak_emoji} Current Streak: {stat['current_streak']}")
-            click.echo(f"  🏆 Best Streak: {stat['longest_streak']}")
-            click.echo(f"  ✅ Total Completions: {stat['total_completions']}")
+            lines.append(f"• ID: {stat.get('habit_id', 'N/A')}")
+            lines.append(f"  Name: {stat['habit_name']}")
+            lines.append(f"  Periodicity: {stat['periodicity']}")
+            lines.append(f"  Created: {created_date}")
+            lines.append(f"  {streak_emoji} Current Streak: {stat['current_streak']}")
+            lines.append(f"  🏆 Best Streak: {stat['longest_streak']}")
+            lines.append(f"  ✅ Total Completions: {stat['total_completions']}")
             
             if 'completion_rate' in stat:
                 if stat['completion_rate'] >= 80:
@@ -155,21 +220,28 @@ def list_all_habits():
                     rate_color = 'yellow'
                 else:
                     rate_color = 'red'
-                click.echo(click.style(f"  📈 Completion Rate: {stat['completion_rate']:.1f}%", fg=rate_color))
+                lines.append(click.style(f"  📈 Completion Rate: {stat['completion_rate']:.1f}%", fg=rate_color))
             
-            click.echo()
+            lines.append("")
+        
+        click.echo("\n".join(lines))
             
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error retrieving habits: {e}", fg='red'))
 
 
 @analyze.command('list-by-periodicity')
-@click.argument('periodicity', type=click.Choice(['daily', 'weekly'], case_sensitive=False))
-def list_by_periodicity(periodicity: str):
+@click.argument('periodicity', type=click.Choice(_PERIODICITY_CHOICES, case_sensitive=False))
+@requires_db
+@click.pass_obj
+def list_by_periodicity(session, periodicity: str):
     """List habits filtered by periodicity (daily or weekly)."""
+    from ..services import analytics_service as analytics
+    
     try:
-        period_enum = Periodicity.DAILY if periodicity.lower() == 'daily' else Periodicity.WEEKLY
-        stats = analytics.get_habits_by_periodicity_with_stats(period_enum)
+        period_enum = _to_periodicity(periodicity)
+        stats = analytics.get_habits_by_periodicity_with_stats(period_enum, session=session)
         
         if not stats:
             click.echo(click.style(f"📝 No {periodicity} habits found.", fg='yellow'))
@@ -189,24 +261,30 @@ def list_by_periodicity(periodicity: str):
             click.echo()
             
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error retrieving habits: {e}", fg='red'))
 
 
 @analyze.command('longest-streak')
 @click.argument('habit_name')
-def longest_streak_for_habit(habit_name: str):
+@requires_db
+@click.pass_obj
+def longest_streak_for_habit(session, habit_name: str):
     """Show the longest streak for a specific habit."""
+    from ..services.habit_service import HabitService
+    from ..services import analytics_service as analytics
+    
     try:
-        habit = HabitService.get_habit_by_name(habit_name)
+        habit = HabitService.get_habit_by_name(habit_name, session=session)
         if not habit:
             click.echo(click.style(f"❌ Habit '{habit_name}' not found.", fg='red'))
             return
         
-        stats = analytics.get_habit_statistics(habit)
+        stats = analytics.get_habit_statistics(habit, session=session)
         longest_streak = stats['longest_streak']
         current_streak = stats['current_streak']
         
-        streak_unit = "days" if habit.periodicity == Periodicity.DAILY else "weeks"
+        streak_unit = "days" if habit.periodicity is _to_periodicity(_DAILY_STR) else "weeks"
         
         click.echo(click.style(f"\n🏆 Streak Analysis for '{habit_name}':", fg='blue', bold=True))
         click.echo(f"Longest streak: {longest_streak} {streak_unit}")
@@ -219,14 +297,19 @@ def longest_streak_for_habit(habit_name: str):
             click.echo(f"📈 {difference} {streak_unit} away from your best!")
             
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error calculating streak: {e}", fg='red'))
 
 
 @analyze.command('longest-streak-all')
-def longest_streak_all_habits():
+@requires_db
+@click.pass_obj
+def longest_streak_all_habits(session):
     """Show the habit with the longest streak across all habits."""
+    from ..services import analytics_service as analytics
+    
     try:
-        best_habit, max_streak = analytics.find_longest_streak_across_all_habits()
+        best_habit, max_streak = analytics.find_longest_streak_habit(session=session)
         
         if best_habit is None:
             click.echo(click.style("📝 No habits found.", fg='yellow'))
@@ -236,23 +319,26 @@ def longest_streak_all_habits():
             click.echo(click.style("📊 No completions found for any habit.", fg='yellow'))
             return
         
-        # Get the habit details to determine the unit
-        habit = HabitService.get_habit_by_name(best_habit)
-        streak_unit = "days" if habit.periodicity == Periodicity.DAILY else "weeks"
+        streak_unit = "days" if best_habit.periodicity is _to_periodicity(_DAILY_STR) else "weeks"
         
         click.echo(click.style(f"\n🏆 Overall Champion:", fg='blue', bold=True))
-        click.echo(f"Longest streak: '{best_habit}' with {max_streak} {streak_unit}")
+        click.echo(f"Longest streak: '{best_habit.name}' with {max_streak} {streak_unit}")
         
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error finding longest streak: {e}", fg='red'))
 
 
 @analyze.command('summary')
 @click.option('--days', default=7, help='Number of days to look back (default: 7)')
-def recent_summary(days: int):
+@requires_db
+@click.pass_obj
+def recent_summary(session, days: int):
     """Show a summary of recent habit activity."""
+    from ..services import analytics_service as analytics
+    
     try:
-        summary = analytics.get_recent_activity_summary(days)
+        summary = analytics.get_recent_activity_summary(days, session=session)
         
         click.echo(click.style(f"\n📊 Activity Summary (Last {days} days):", fg='blue', bold=True))
         click.echo("-" * 40)
@@ -267,19 +353,23 @@ def recent_summary(days: int):
                 streak = activity['current_streak']
                 periodicity = activity['periodicity']
                 
-                streak_unit = "days" if periodicity == 'daily' else "weeks"
+                streak_unit = "days" if periodicity == _DAILY_STR else "weeks"
                 streak_emoji = "🔥" if streak > 0 else "💤"
                 
                 click.echo(f"• {name}: {completions} completions, {streak_emoji} {streak} {streak_unit} streak")
         
     except Exception as e:
+        session.rollback()
         click.echo(click.style(f"❌ Error generating summary: {e}", fg='red'))
 
 
 @cli.command()
 @click.confirmation_option(prompt='This will delete ALL habits and data. Are you sure?')
+@requires_db
 def reset():
     """Reset the database (delete all habits and data)."""
+    from ..core.database import db_manager
+    
     try:
         db_manager.reset_database()
         click.echo(click.style("✅ Database reset successfully! All data has been cleared.", fg='green'))
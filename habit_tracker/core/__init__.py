@@ -1,15 +1,34 @@
 """Core module containing database models and configuration."""
 
-from .models import Periodicity, Base, Habit, Completion
-from .database import DatabaseManager, get_db_session, get_session_scope
-
-__all__ = [
-    "Habit",
-    "Completion", 
-    "Periodicity", 
-    "Base",
-    "DatabaseManager", 
-    "get_db_session", 
-    "get_session_scope"
-]
+from importlib import import_module
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from .models import Periodicity, Base, Habit, Completion
+    from .database import DatabaseManager, get_db_session, get_session_scope
+
+# Submodule defining each re-exported name
+_EXPORTS = {
+    "Habit": "models",
+    "Completion": "models",
+    "Periodicity": "models",
+    "Base": "models",
+    "DatabaseManager": "database",
+    "get_db_session": "database",
+    "get_session_scope": "database",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """
+    Resolve the model and database re-exports on first access.
+    
+    Both submodules import SQLAlchemy, so loading them is deferred until one
+    of their names is requested; importing ``habit_tracker.core.exceptions``
+    (as the CLI does) then stays cheap.
+    """
+    if name in _EXPORTS:
+        return getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,21 +5,78 @@ This module handles SQLite database connection, session creation, and initializa
 """
 
 import os
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import contextmanager, nullcontext
+from typing import Generator, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 
 from .models import Base
 
 
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# single writer, NORMAL sync skips the per-commit fsync that WAL makes safe,
+# and the cache/mmap sizes keep the working set in memory.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA cache_size=-20000",
+)
+
+
+# Stored in SQLite's PRAGMA user_version once the tables exist; bump it when
+# the ORM schema changes so existing databases get _create_schema run again.
+# Version 2 stores habits.periodicity as an integer code; version 3 adds the
+# indexes that version 2 did not create on already existing tables and drops
+# the ones the models no longer define.
+SCHEMA_VERSION = 3
+
+# Rewrites periodicity names left by older databases into integer codes
+_PERIODICITY_CODES_SQL = (
+    "UPDATE habits SET periodicity = CASE periodicity "
+    "WHEN 'DAILY' THEN 0 WHEN 'WEEKLY' THEN 1 ELSE periodicity END"
+)
+
+# Indexes older databases may still carry; the habit_id index is covered by
+# the leading column of idx_completion_habit_date
+_OBSOLETE_INDEXES_SQL = "DROP INDEX IF EXISTS ix_completions_habit_id"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to a freshly opened DBAPI connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _create_schema(bind) -> None:
+    """
+    Create missing tables, then any indexes missing from existing tables.
+    
+    create_all skips a table that already exists together with its indexes,
+    so indexes added to the models later are created one by one.
+    
+    Args:
+        bind: Engine or connection to create the schema on
+    """
+    Base.metadata.create_all(bind=bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+
 class DatabaseManager:
     """
     Manages database connections and sessions for the application.
     
     This class provides a singleton pattern for database access and handles
-    session lifecycle management.
+    session lifecycle management. The engine is created lazily on first use,
+    so constructing the manager does not touch the database.
     """
     
     _instance = None
@@ -31,10 +88,6 @@ class DatabaseManager:
             cls._instance = super(DatabaseManager, cls).__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self._engine is None:
-            self.init_db()
-    
     def init_db(self, database_url: str = None) -> None:
         """
         Initialize the database connection and create tables.
@@ -51,12 +104,19 @@ class DatabaseManager:
             db_path = os.path.join(data_dir, "habits.db")
             database_url = f"sqlite:///{db_path}"
         
+        is_sqlite = database_url.startswith("sqlite")
+        
         self._engine = create_engine(
             database_url,
             echo=False,  # Set to True for SQL debugging
             pool_pre_ping=True,  # Verify connections before use
+            # Pooled connections may be handed to a different thread
+            connect_args={"check_same_thread": False} if is_sqlite else {},
         )
         
+        if is_sqlite:
+            event.listen(self._engine, "connect", _apply_sqlite_pragmas)
+        
         # Create session factory
         self._session_factory = sessionmaker(
             bind=self._engine,
@@ -65,8 +125,28 @@ class DatabaseManager:
             expire_on_commit=False,  # Prevent detached instance errors
         )
         
-        # Create all tables
-        Base.metadata.create_all(bind=self._engine)
+        self._ensure_schema()
+    
+    def _ensure_schema(self) -> None:
+        """
+        Create all tables and indexes unless the database already has the current schema.
+        
+        For SQLite a single ``PRAGMA user_version`` read replaces the per-table
+        and per-index existence checks on every start; other backends always
+        run them. Databases from before the integer periodicity column have
+        their stored names converted in place, and obsolete indexes dropped.
+        """
+        if self._engine.dialect.name != "sqlite":
+            _create_schema(self._engine)
+            return
+        
+        with self._engine.begin() as connection:
+            if connection.exec_driver_sql("PRAGMA user_version").scalar() >= SCHEMA_VERSION:
+                return
+            _create_schema(connection)
+            connection.exec_driver_sql(_OBSOLETE_INDEXES_SQL)
+            connection.exec_driver_sql(_PERIODICITY_CODES_SQL)
+            connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
     def get_engine(self):
         """Get the SQLAlchemy engine."""
@@ -141,11 +221,17 @@ def get_db_session() -> Session:
     return db_manager.get_session()
 
 
-def get_session_scope():
+def get_session_scope(session: Optional[Session] = None):
     """
     Convenience function to get a session context manager.
     
+    Args:
+        session: Optional session already managed by the caller. When given,
+            it is yielded as-is and is neither committed nor closed here.
+    
     Returns:
         A context manager for database sessions.
     """
+    if session is not None:
+        return nullcontext(session)
     return db_manager.session_scope()
@@ -5,13 +5,14 @@ This module contains the Completion model representing when habits were complete
 """
 
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Optional
 
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index, insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from . import Base
+from .enums import Periodicity
 
 # Avoid circular imports
 if TYPE_CHECKING:
@@ -32,12 +33,17 @@ class Completion(Base):
         habit: Relationship back to the habit
     """
     __tablename__ = "completions"
+    __table_args__ = (
+        # Serves per-habit lookups and completed_at range scans from one index;
+        # newest-first queries walk it backwards, so no separate DESC index
+        Index('idx_completion_habit_date', 'habit_id', 'completed_at'),
+    )
     
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
     
     # Foreign key to habit
-    habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False, index=True)
+    habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False)
     
     # Timestamp
     completed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -65,33 +71,39 @@ class Completion(Base):
         """Get the time portion of the completion timestamp."""
         return self.completed_at.time() if self.completed_at else None
     
-    def is_today(self) -> bool:
-        """Check if this completion was made today."""
+    def is_today(self, now: Optional[datetime] = None) -> bool:
+        """Check if this completion was made today (relative to ``now`` if given)."""
         if not self.completed_at:
             return False
-        return self.completed_at.date() == datetime.now().date()
+        return self.completed_at.date() == (now or datetime.now()).date()
     
-    def days_ago(self) -> int:
-        """Get the number of days since this completion."""
+    def days_ago(self, now: Optional[datetime] = None) -> int:
+        """Get the number of days since this completion (relative to ``now`` if given)."""
         if not self.completed_at:
             return 999999  # Large number instead of float('inf')
-        return (datetime.now().date() - self.completed_at.date()).days
+        return ((now or datetime.now()).date() - self.completed_at.date()).days
     
-    def to_dict(self) -> dict:
+    def to_dict(self, now: Optional[datetime] = None) -> dict:
         """
         Convert completion to dictionary representation.
         
+        Args:
+            now: Optional reference time; pass one value when serializing
+                 a batch so every row is measured against the same instant
+        
         Returns:
             Dictionary containing completion attributes
         """
+        if now is None:
+            now = datetime.now()
         return {
             'id': self.id,
             'habit_id': self.habit_id,
             'habit_name': self.habit.name if self.habit else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'completion_date': self.completion_date.isoformat() if self.completion_date else None,
-            'is_today': self.is_today(),
-            'days_ago': self.days_ago()
+            'is_today': self.is_today(now),
+            'days_ago': self.days_ago(now)
         }
     
     def is_in_same_period(self, other_completion) -> bool:
@@ -119,13 +131,14 @@ class Completion(Base):
         if not self.habit:
             return False
             
-        if self.habit.periodicity.name == 'DAILY':
-            return self.completed_at.date() == other_date.date()
+        self_ordinal = self.completed_at.toordinal()
+        other_ordinal = other_date.toordinal()
+        
+        if self.habit.periodicity is Periodicity.DAILY:
+            return self_ordinal == other_ordinal
         else:  # WEEKLY
-            # Check if both dates are in the same week
-            self_week_start = self.completed_at.date() - timedelta(days=self.completed_at.weekday())
-            other_week_start = other_date.date() - timedelta(days=other_date.weekday())
-            return self_week_start == other_week_start
+            # Ordinal 1 is a Monday, so (ordinal - 1) // 7 numbers Monday-based weeks
+            return (self_ordinal - 1) // 7 == (other_ordinal - 1) // 7
     
     @classmethod
     def create_event(cls, habit_id: int, completion_date=None):
@@ -147,4 +160,26 @@ class Completion(Base):
         return cls(
             habit_id=habit_id,
             completed_at=completion_date
-        )
\ No newline at end of file
+        )
+    
+    @classmethod
+    def bulk_create(cls, session, habit_id: int, dates: Iterable[datetime]) -> int:
+        """
+        Insert many completion events for a habit in a single statement.
+        
+        Rows go through one executemany INSERT instead of being added one
+        ORM instance at a time. No per-period duplicate check is performed,
+        so callers are responsible for passing valid dates.
+        
+        Args:
+            session: Active database session (committed by the caller)
+            habit_id: ID of the habit being completed
+            dates: Datetimes of the completions to record
+            
+        Returns:
+            Number of completions inserted
+        """
+        rows = [{"habit_id": habit_id, "completed_at": completed_at} for completed_at in dates]
+        if rows:
+            session.execute(insert(cls), rows)
+        return len(rows)
@@ -0,0 +1,88 @@
+"""
+Debugging helpers for the Habit Tracker data layer.
+
+This module provides tools to observe the SQL emitted by data access code,
+mainly so tests can catch N+1 query regressions and statements that miss
+SQLAlchemy's compiled statement cache.
+"""
+
+from contextlib import contextmanager
+from typing import Generator, List, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Session
+
+
+# Transaction control emitted around nested transactions (such as the
+# per-test savepoints); these are not queries and are left out of the count
+_SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+@contextmanager
+def count_queries(bind: Union[Session, Engine]) -> Generator[List[str], None, None]:
+    """
+    Record every SQL statement executed on an engine while the block runs.
+    
+    Savepoint statements are not recorded.
+    
+    Args:
+        bind: The engine to watch, or a session whose engine should be watched
+    
+    Yields:
+        A list that collects the statements as they are executed
+    
+    Example:
+        with count_queries(session) as queries:
+            habit.to_dict(stats)
+        assert len(queries) == 0
+    """
+    engine = bind.get_bind() if isinstance(bind, Session) else bind
+    queries: List[str] = []
+    
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(_SAVEPOINT_STATEMENTS):
+            queries.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+
+@contextmanager
+def count_compilations(bind: Union[Session, Engine]) -> Generator[List[str], None, None]:
+    """
+    Record every statement the engine had to compile while the block runs.
+    
+    SQLAlchemy keeps compiled forms in an LRU cache on the engine, keyed by
+    statement structure, so repeating a query with new parameters should
+    not compile it again. Statements without a cache key, such as the
+    savepoint commands, are not recorded.
+    
+    Args:
+        bind: The engine to watch, or a session whose engine should be watched
+    
+    Yields:
+        A list that collects the statements compiled on a cache miss
+    
+    Example:
+        HabitService.get_habit_by_name("Read")
+        with count_compilations(engine) as compiled:
+            HabitService.get_habit_by_name("Write")
+        assert compiled == []
+    """
+    engine = bind.get_bind() if isinstance(bind, Session) else bind
+    compiled: List[str] = []
+    
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if context.cache_hit is CacheStats.CACHE_MISS:
+            compiled.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield compiled
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
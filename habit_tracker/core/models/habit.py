@@ -5,18 +5,18 @@ This module contains the Habit model representing trackable habits.
 """
 
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import Optional
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, select
+from sqlalchemy.orm import relationship, object_session
 from sqlalchemy.sql import func
 
 from . import Base
 from .enums import Periodicity
-
-# Avoid circular imports
-if TYPE_CHECKING:
-    from .completion import Completion
+from .types import PeriodicityType
+# completion.py only references Habit under TYPE_CHECKING, so the mapped class
+# can be imported once here instead of being resolved on every call
+from .completion import Completion
 
 
 class Habit(Base):
@@ -42,7 +42,7 @@ class Habit(Base):
     # Core habit information
     name = Column(String(100), unique=True, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    periodicity = Column(Enum(Periodicity), nullable=False)
+    periodicity = Column(PeriodicityType, nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -52,7 +52,11 @@ class Habit(Base):
         "Completion", 
         back_populates="habit", 
         cascade="all, delete-orphan",
-        lazy="dynamic"  # For better performance with large completion lists
+        order_by="desc(Completion.completed_at)",
+        # Never loaded implicitly: callers that need the collection load it
+        # with selectinload, so a per-habit lazy load fails loudly instead of
+        # silently becoming an N+1 query pattern
+        lazy="raise"
     )
     
     def __repr__(self) -> str:
@@ -73,8 +77,22 @@ class Habit(Base):
     
     @property
     def completion_count(self) -> int:
-        """Get the total number of completions for this habit."""
-        return self.completions.count()
+        """
+        Get the total number of completions for this habit.
+        
+        Issues a plain ``SELECT count(...) ... WHERE habit_id = ?`` (rather
+        than the subquery the dynamic relationship wraps around ``count()``),
+        reusing the session this habit is attached to when there is one.
+        """
+        from ..database import get_session_scope
+        
+        if self.id is None:
+            return 0
+        
+        with get_session_scope(object_session(self)) as session:
+            return session.scalar(
+                select(func.count(Completion.id)).where(Completion.habit_id == self.id)
+            )
     
     def get_recent_completions(self, limit: int = 10):
         """
@@ -86,10 +104,14 @@ class Habit(Base):
         Returns:
             List of recent Completion objects
         """
-        return (self.completions
-                .order_by(self.completions.property.mapper.class_.completed_at.desc())
-                .limit(limit)
-                .all())
+        from ..database import get_session_scope
+        
+        with get_session_scope(object_session(self)) as session:
+            return (session.query(Completion)
+                    .filter(Completion.habit_id == self.id)
+                    .order_by(Completion.completed_at.desc())
+                    .limit(limit)
+                    .all())
     
     def check_off(self, completion_date=None):
         """
@@ -113,52 +135,108 @@ class Habit(Base):
         
         return HabitService.log_completion(self.name, completion_date)
     
-    def to_dict(self) -> dict:
+    def to_dict(self, stats: Optional[dict] = None) -> dict:
         """
         Convert habit to dictionary representation.
         
+        Args:
+            stats: Optional pre-aggregated values (e.g. from
+                   ``habit_repository.find_summaries``). A
+                   ``completion_count`` entry is used instead of querying;
+                   ``last_completed`` and ``current_streak`` entries are
+                   added to the output when present. With a full stats
+                   dict, serialization issues no queries.
+        
         Returns:
             Dictionary containing habit attributes
         """
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'periodicity': self.periodicity.value,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completion_count': self.completion_count,
-            'is_daily': self.is_daily(),
-            'is_weekly': self.is_weekly()
+        stats = stats or {}
+        completion_count = stats.get('completion_count')
+        if completion_count is None:
+            completion_count = self.completion_count
+        
+        return Habit.row_to_dict(self, completion_count, stats)
+    
+    @staticmethod
+    def row_to_dict(row, completion_count: int, stats: Optional[dict] = None) -> dict:
+        """
+        Build the dictionary representation from habit columns.
+        
+        Shared by ``to_dict`` and by listings that read plain column rows
+        (e.g. from ``habit_repository.find_summaries``) instead of Habit
+        instances, so both produce the same output.
+        
+        Args:
+            row: A Habit, or a row exposing id, name, description,
+                 periodicity and created_at
+            completion_count: Number of completions for the habit
+            stats: Optional ``last_completed`` and ``current_streak``
+                   values to add to the output
+        
+        Returns:
+            Dictionary containing habit attributes
+        """
+        stats = stats or {}
+        
+        # Periodicity has exactly two members, so one comparison decides both flags
+        periodicity = row.periodicity
+        daily = periodicity is Periodicity.DAILY
+        created_at = row.created_at
+        
+        data = {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'periodicity': periodicity.value,
+            'created_at': created_at.isoformat() if created_at else None,
+            'completion_count': completion_count,
+            'is_daily': daily,
+            'is_weekly': not daily
         }
+        
+        if 'last_completed' in stats:
+            last_completed = stats['last_completed']
+            data['last_completed'] = last_completed.isoformat() if last_completed else None
+        if 'current_streak' in stats:
+            data['current_streak'] = stats['current_streak']
+        
+        return data
     
-    def get_current_streak(self) -> int:
+    def get_current_streak(self, session=None) -> int:
         """
         Get the current streak for this habit.
         
+        Args:
+            session: Optional existing database session
+            
         Returns:
             Current streak length
         """
-        from ...services.analytics_service import calculate_streak, HabitService
+        from .repository import completion_repository
         
-        completions = HabitService.get_completions_for_habit(self.id)
-        return calculate_streak(completions, self.periodicity)
+        return completion_repository.current_streak(self.id, self.periodicity, session=session)
     
-    def get_longest_streak(self) -> int:
+    def get_longest_streak(self, session=None) -> int:
         """
         Get the longest streak ever achieved for this habit.
         
+        Args:
+            session: Optional existing database session
+            
         Returns:
             Longest streak length
         """
-        from ...services.analytics_service import calculate_longest_streak, HabitService
+        from .repository import completion_repository
         
-        completions = HabitService.get_completions_for_habit(self.id)
-        return calculate_longest_streak(completions, self.periodicity)
+        return completion_repository.longest_streak(self.id, self.periodicity, session=session)
     
-    def is_completed_today(self) -> bool:
+    def is_completed_today(self, session=None) -> bool:
         """
         Check if this habit is completed for today/this week.
         
+        Args:
+            session: Optional existing database session
+            
         Returns:
             True if completed for the current period
         """
@@ -166,6 +244,7 @@ class Habit(Base):
         from ...services.habit_service import HabitService
         
         return HabitService._is_habit_completed_for_period(
-            self.id, 
-            datetime.now()
+            self, 
+            datetime.now(),
+            session
         )
\ No newline at end of file
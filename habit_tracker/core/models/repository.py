@@ -6,42 +6,102 @@ following the Repository design pattern, making the OOP structure more explicit.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Protocol
+from typing import Dict, Iterable, List, Optional, Protocol, Tuple
 from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Date, DateTime, Row, and_, bindparam, case, desc, exists, func, select, text
 
 from .habit import Habit
 from .completion import Completion
 from .enums import Periodicity
+from .types import PeriodicityType
 from ..database import get_session_scope
 
 
+# SQLite expression giving date.toordinal() of a completion's calendar day
+# (julianday of a date is N.5; 1721424.5 is the offset between the two scales)
+_ORDINAL_SQL = "CAST(julianday(date(completed_at)) - 1721424.5 AS INTEGER)"
+
+# Period index per periodicity, matching analytics_service._period_index:
+# the day ordinal, or the Monday-based week bucket (ordinal 1 is a Monday)
+_PERIOD_SQL = {
+    Periodicity.DAILY: _ORDINAL_SQL,
+    Periodicity.WEEKLY: f"({_ORDINAL_SQL} - 1) / 7",
+}
+
+# Gaps-and-islands: consecutive periods share the same period - row_number().
+# {window} optionally narrows the scan with a lower completed_at bound.
+_STREAK_ISLANDS_SQL = """
+    WITH periods AS (
+        SELECT DISTINCT {period} AS period
+        FROM completions
+        WHERE habit_id = :habit_id{window}
+    ), islands AS (
+        SELECT period, period - ROW_NUMBER() OVER (ORDER BY period) AS island
+        FROM periods
+    )
+"""
+
+# Longest streak of every habit at once: the period expression is picked per
+# row from the habit's stored periodicity code, and islands are numbered
+# within each habit. Ends in a "streaks" CTE of (habit_id, streak) rows.
+_LONGEST_STREAKS_CTE = f"""
+    WITH periods AS (
+        SELECT DISTINCT completions.habit_id,
+               CASE habits.periodicity
+                   WHEN {PeriodicityType.CODES[Periodicity.DAILY]} THEN {_PERIOD_SQL[Periodicity.DAILY]}
+                   ELSE {_PERIOD_SQL[Periodicity.WEEKLY]}
+               END AS period
+        FROM completions
+        JOIN habits ON habits.id = completions.habit_id
+    ), islands AS (
+        SELECT habit_id,
+               period - ROW_NUMBER() OVER (PARTITION BY habit_id ORDER BY period) AS island
+        FROM periods
+    ), streaks AS (
+        SELECT habit_id, MAX(length) AS streak
+        FROM (SELECT habit_id, COUNT(*) AS length FROM islands GROUP BY habit_id, island)
+        GROUP BY habit_id
+    )
+"""
+
+# How many periods back from the current one the current streak query scans
+# before falling back to the habit's full history
+_CURRENT_STREAK_WINDOW = 366
+
+
 class HabitRepositoryInterface(Protocol):
     """Protocol defining the interface for habit repositories."""
     
-    def save(self, habit: Habit) -> Habit:
+    def save(self, habit: Habit, session: Optional[Session] = None) -> Habit:
         """Save a habit to the repository."""
         ...
     
-    def find_by_id(self, habit_id: int) -> Optional[Habit]:
+    def find_by_id(self, habit_id: int, session: Optional[Session] = None) -> Optional[Habit]:
         """Find a habit by its ID."""
         ...
     
-    def find_by_name(self, name: str) -> Optional[Habit]:
+    def find_by_name(self, name: str, session: Optional[Session] = None) -> Optional[Habit]:
         """Find a habit by its name."""
         ...
     
-    def find_all(self) -> List[Habit]:
+    def find_all(self, with_completions: bool = False,
+                 session: Optional[Session] = None) -> List[Habit]:
         """Get all habits."""
         ...
     
-    def find_by_periodicity(self, periodicity: Periodicity) -> List[Habit]:
+    def find_by_periodicity(self, periodicity: Periodicity, session: Optional[Session] = None) -> List[Habit]:
         """Find habits by their periodicity."""
         ...
     
-    def delete(self, habit: Habit) -> bool:
+    def count_by_periodicity(self, session: Optional[Session] = None) -> Dict[Periodicity, int]:
+        """Count habits per periodicity."""
+        ...
+    
+    def delete(self, habit: Habit, session: Optional[Session] = None) -> bool:
         """Delete a habit from the repository."""
         ...
 
@@ -49,19 +109,24 @@ class HabitRepositoryInterface(Protocol):
 class CompletionRepositoryInterface(Protocol):
     """Protocol defining the interface for completion repositories."""
     
-    def save(self, completion: Completion) -> Completion:
+    def save(self, completion: Completion, session: Optional[Session] = None) -> Completion:
         """Save a completion to the repository."""
         ...
     
-    def find_by_habit_id(self, habit_id: int) -> List[Completion]:
+    def find_by_habit_id(self, habit_id: int, session: Optional[Session] = None) -> List[Completion]:
         """Find all completions for a specific habit."""
         ...
     
-    def find_all(self) -> List[Completion]:
+    def find_by_habit_ids(self, habit_ids: Iterable[int],
+                          session: Optional[Session] = None) -> Dict[int, List[Completion]]:
+        """Find the completions of several habits at once, grouped by habit ID."""
+        ...
+    
+    def find_all(self, session: Optional[Session] = None) -> List[Completion]:
         """Get all completions."""
         ...
     
-    def delete(self, completion: Completion) -> bool:
+    def delete(self, completion: Completion, session: Optional[Session] = None) -> bool:
         """Delete a completion from the repository."""
         ...
 
@@ -69,17 +134,18 @@ class CompletionRepositoryInterface(Protocol):
 class SQLAlchemyHabitRepository:
     """SQLAlchemy implementation that conforms to HabitRepositoryInterface protocol."""
     
-    def save(self, habit: Habit) -> Habit:
+    def save(self, habit: Habit, session: Session = None) -> Habit:
         """
         Save a habit to the database.
         
         Args:
             habit: The habit to save
+            session: Optional existing database session
             
         Returns:
             The saved habit with updated ID if new
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             if habit.id:
                 # Update existing habit
                 session.merge(habit)
@@ -89,101 +155,180 @@ class SQLAlchemyHabitRepository:
             session.flush()
             return habit
     
-    def find_by_id(self, habit_id: int) -> Optional[Habit]:
+    def find_by_id(self, habit_id: int, session: Session = None) -> Optional[Habit]:
         """
         Find a habit by its ID.
         
         Args:
             habit_id: The ID to search for
+            session: Optional existing database session
             
         Returns:
             The habit if found, None otherwise
         """
-        with get_session_scope() as session:
-            return session.query(Habit).filter(Habit.id == habit_id).first()
+        with get_session_scope(session) as session:
+            return session.get(Habit, habit_id)
     
-    def find_by_name(self, name: str) -> Optional[Habit]:
+    def find_by_name(self, name: str, session: Session = None) -> Optional[Habit]:
         """
         Find a habit by its name.
         
         Args:
             name: The name to search for
+            session: Optional existing database session
             
         Returns:
             The habit if found, None otherwise
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Habit).filter(Habit.name == name).first()
     
-    def find_all(self) -> List[Habit]:
+    def find_all(self, with_completions: bool = False, session: Session = None) -> List[Habit]:
         """
         Get all habits from the database.
         
+        Args:
+            with_completions: Eagerly load every habit's completions with one
+                              extra ``WHERE habit_id IN (...)`` query, for
+                              callers that iterate them
+            session: Optional existing database session
+            
         Returns:
             List of all habits ordered by creation date
         """
-        with get_session_scope() as session:
-            return session.query(Habit).order_by(Habit.created_at).all()
+        with get_session_scope(session) as session:
+            query = session.query(Habit)
+            if with_completions:
+                query = query.options(selectinload(Habit.completions))
+            return query.order_by(Habit.created_at).all()
+    
+    def find_summaries(self, periodicity: Optional[Periodicity] = None,
+                       recent_since: Optional[datetime] = None,
+                       session: Session = None) -> List[Row]:
+        """
+        Get the columns and completion aggregates of habits as plain rows.
+        
+        The aggregates come from one outer-joined GROUP BY query, so listing
+        habits does not need a count query per habit. Columns are selected
+        instead of the entity: no Habit instances are built or tracked by
+        the session, which is what listings that only serialize need.
+        
+        Args:
+            periodicity: Optional periodicity to filter by
+            recent_since: Optional cutoff; when given, the rows also carry a
+                          recent_count of completions at or after it, counted
+                          in the same GROUP BY pass as the totals
+            session: Optional existing database session
+            
+        Returns:
+            Rows exposing id, name, description, periodicity, created_at,
+            completion_count, first_completed and last_completed (plus
+            recent_count), ordered by creation date
+        """
+        columns = [
+            Habit.id,
+            Habit.name,
+            Habit.description,
+            Habit.periodicity,
+            Habit.created_at,
+            func.count(Completion.id).label('completion_count'),
+            func.min(Completion.completed_at).label('first_completed'),
+            func.max(Completion.completed_at).label('last_completed'),
+        ]
+        if recent_since is not None:
+            columns.append(func.sum(
+                case((Completion.completed_at >= recent_since, 1), else_=0)
+            ).label('recent_count'))
+        
+        with get_session_scope(session) as session:
+            query = select(*columns).outerjoin(Completion, Completion.habit_id == Habit.id)
+            
+            if periodicity is not None:
+                query = query.where(Habit.periodicity == periodicity)
+            
+            return session.execute(
+                query.group_by(Habit.id).order_by(Habit.created_at, Habit.id)
+            ).all()
     
-    def find_by_periodicity(self, periodicity: Periodicity) -> List[Habit]:
+    def find_by_periodicity(self, periodicity: Periodicity, session: Session = None) -> List[Habit]:
         """
         Find habits by their periodicity.
         
         Args:
             periodicity: The periodicity to filter by
+            session: Optional existing database session
             
         Returns:
             List of habits with the specified periodicity
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Habit).filter(
                 Habit.periodicity == periodicity
             ).order_by(Habit.created_at).all()
     
-    def delete(self, habit: Habit) -> bool:
+    def count_by_periodicity(self, session: Session = None) -> Dict[Periodicity, int]:
+        """
+        Count habits per periodicity without loading them.
+        
+        Args:
+            session: Optional existing database session
+            
+        Returns:
+            Dictionary mapping each periodicity that has habits to its count
+        """
+        with get_session_scope(session) as session:
+            return dict(session.execute(
+                select(Habit.periodicity, func.count(Habit.id)).group_by(Habit.periodicity)
+            ).all())
+    
+    def delete(self, habit: Habit, session: Session = None) -> bool:
         """
         Delete a habit from the database.
         
         Args:
             habit: The habit to delete
+            session: Optional existing database session
             
         Returns:
             True if deleted successfully
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             if habit.id:
                 session.delete(session.merge(habit))
                 return True
             return False
     
-    def exists_by_name(self, name: str) -> bool:
+    def exists_by_name(self, name: str, session: Session = None) -> bool:
         """
         Check if a habit with the given name exists.
         
         Args:
             name: The name to check
+            session: Optional existing database session
             
         Returns:
             True if a habit with this name exists
         """
-        with get_session_scope() as session:
-            return session.query(Habit).filter(Habit.name == name).count() > 0
+        with get_session_scope(session) as session:
+            # SELECT EXISTS(...) lets the database stop at the first match
+            return session.scalar(select(exists().where(Habit.name == name)))
 
 
 class SQLAlchemyCompletionRepository:
     """SQLAlchemy implementation of the CompletionRepository."""
     
-    def save(self, completion: Completion) -> Completion:
+    def save(self, completion: Completion, session: Session = None) -> Completion:
         """
         Save a completion to the database.
         
         Args:
             completion: The completion to save
+            session: Optional existing database session
             
         Returns:
             The saved completion with updated ID if new
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             if completion.id:
                 session.merge(completion)
             else:
@@ -191,35 +336,145 @@ class SQLAlchemyCompletionRepository:
             session.flush()
             return completion
     
-    def find_by_habit_id(self, habit_id: int) -> List[Completion]:
+    def find_by_habit_id(self, habit_id: int, session: Session = None) -> List[Completion]:
         """
         Find all completions for a specific habit.
         
         Args:
             habit_id: The habit ID to search for
+            session: Optional existing database session
             
         Returns:
             List of completions ordered by completion date (newest first)
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Completion).filter(
                 Completion.habit_id == habit_id
             ).order_by(desc(Completion.completed_at)).all()
     
-    def find_all(self) -> List[Completion]:
+    def find_dates_by_habit_id(self, habit_id: int, session: Session = None) -> List[Row]:
+        """
+        Find the distinct calendar days on which a habit was completed.
+        
+        For streak calculations, which only need the day of each completion:
+        the date conversion and deduplication happen in SQL and no Completion
+        objects are built.
+        
+        Args:
+            habit_id: The habit ID to search for
+            session: Optional existing database session
+            
+        Returns:
+            Rows exposing ``completed_at`` as a date, newest first
+        """
+        day = func.date(Completion.completed_at, type_=Date).label("completed_at")
+        
+        with get_session_scope(session) as session:
+            return session.execute(
+                select(day).where(Completion.habit_id == habit_id).distinct().order_by(desc(day))
+            ).all()
+    
+    def find_times_by_habit_id(self, habit_id: int, session: Session = None) -> List[Row]:
+        """
+        Find the completion timestamps of a habit as plain rows.
+        
+        Selects only ``completed_at``, so no Completion instances are built or
+        added to the identity map. The rows expose ``completed_at`` and can be
+        fed straight into the streak functions.
+        
+        Args:
+            habit_id: The habit ID to search for
+            session: Optional existing database session
+            
+        Returns:
+            Rows of (completed_at,), newest first
+        """
+        with get_session_scope(session) as session:
+            return session.execute(
+                select(Completion.completed_at)
+                .where(Completion.habit_id == habit_id)
+                .order_by(desc(Completion.completed_at))
+            ).all()
+    
+    def find_times_by_habit_ids(self, habit_ids: Optional[Iterable[int]] = None,
+                                session: Session = None) -> Dict[int, List[Row]]:
+        """
+        Find completion timestamps of several habits in one query, grouped by habit ID.
+        
+        Args:
+            habit_ids: Optional habit IDs to restrict the query to
+                       (``WHERE habit_id IN (...)``). Defaults to all habits.
+            session: Optional existing database session
+            
+        Returns:
+            Dictionary mapping the IDs of habits with completions to rows of
+            (habit_id, completed_at), oldest first
+        """
+        query = (
+            select(Completion.habit_id, Completion.completed_at)
+            .order_by(Completion.habit_id, Completion.completed_at)
+        )
+        if habit_ids is not None:
+            query = query.where(Completion.habit_id.in_(habit_ids))
+        
+        with get_session_scope(session) as session:
+            rows = session.execute(query).all()
+        
+        return {
+            habit_id: list(group)
+            for habit_id, group in groupby(rows, key=attrgetter("habit_id"))
+        }
+    
+    def find_by_habit_ids(self, habit_ids: Iterable[int],
+                          session: Session = None) -> Dict[int, List[Completion]]:
+        """
+        Find the completions of several habits in a single query.
+        
+        Replaces one ``find_by_habit_id`` call per habit with one
+        ``WHERE habit_id IN (...)`` query, read in (habit_id, completed_at)
+        index order and grouped in Python.
+        
+        Args:
+            habit_ids: The habit IDs to search for
+            session: Optional existing database session
+            
+        Returns:
+            Dictionary mapping every requested habit ID to its completions
+            ordered by completion date (newest first); habits without
+            completions map to an empty list
+        """
+        grouped = {habit_id: [] for habit_id in habit_ids}
+        if not grouped:
+            return grouped
+        
+        with get_session_scope(session) as session:
+            completions = session.scalars(
+                select(Completion)
+                .where(Completion.habit_id.in_(grouped))
+                .order_by(Completion.habit_id, desc(Completion.completed_at))
+            )
+            for completion in completions:
+                grouped[completion.habit_id].append(completion)
+        
+        return grouped
+    
+    def find_all(self, session: Session = None) -> List[Completion]:
         """
         Get all completions from the database.
         
+        Args:
+            session: Optional existing database session
+            
         Returns:
             List of all completions ordered by completion date (newest first)
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Completion).order_by(
                 desc(Completion.completed_at)
             ).all()
     
     def find_in_period(self, habit_id: int, start_date: datetime, 
-                      end_date: datetime) -> List[Completion]:
+                      end_date: datetime, session: Session = None) -> List[Completion]:
         """
         Find completions for a habit within a date range.
         
@@ -227,11 +482,12 @@ class SQLAlchemyCompletionRepository:
             habit_id: The habit ID
             start_date: Start of the date range
             end_date: End of the date range
+            session: Optional existing database session
             
         Returns:
             List of completions within the date range
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Completion).filter(
                 and_(
                     Completion.habit_id == habit_id,
@@ -240,17 +496,151 @@ class SQLAlchemyCompletionRepository:
                 )
             ).order_by(desc(Completion.completed_at)).all()
     
-    def delete(self, completion: Completion) -> bool:
+    def exists_in_period(self, habit_id: int, start_date: datetime,
+                         end_date: datetime, session: Session = None) -> bool:
+        """
+        Check whether a habit has any completion within a date range.
+        
+        Compiles to ``SELECT EXISTS(...)`` over the half-open range, so the
+        database stops at the first index hit and no rows are loaded.
+        
+        Args:
+            habit_id: The habit ID
+            start_date: Start of the date range (inclusive)
+            end_date: End of the date range (exclusive)
+            session: Optional existing database session
+            
+        Returns:
+            True if at least one completion falls within the range
+        """
+        with get_session_scope(session) as session:
+            return session.scalar(select(exists().where(
+                Completion.habit_id == habit_id,
+                Completion.completed_at >= start_date,
+                Completion.completed_at < end_date
+            )))
+    
+    def current_streak(self, habit_id: int, periodicity: Periodicity,
+                       end_date: datetime = None, session: Session = None) -> int:
+        """
+        Calculate a habit's current streak inside the database.
+        
+        Only the last run of consecutive periods (its length and final
+        period) is returned to Python, instead of every completion row.
+        The scan is limited to the last ``_CURRENT_STREAK_WINDOW`` periods and
+        only repeated over the full history when the streak reaches the
+        start of that window. Semantics match
+        ``analytics_service.calculate_streak``.
+        
+        Args:
+            habit_id: The habit ID
+            periodicity: Whether the habit is daily or weekly
+            end_date: Optional end date for the streak. Defaults to now.
+            session: Optional existing database session
+            
+        Returns:
+            The current streak length (number of consecutive periods)
+        """
+        if end_date is None:
+            end_date = datetime.now()
+        
+        daily = periodicity == Periodicity.DAILY
+        ordinal = end_date.toordinal()
+        current_period = ordinal if daily else (ordinal - 1) // 7
+        
+        # Midnight of the first day in the window's oldest period
+        first_period = current_period - _CURRENT_STREAK_WINDOW
+        since = datetime.fromordinal(first_period if daily else first_period * 7 + 1)
+        
+        last_island = """
+            SELECT MIN(period), MAX(period), COUNT(*)
+            FROM islands
+            WHERE island = (SELECT island FROM islands ORDER BY period DESC LIMIT 1)
+        """
+        period = _PERIOD_SQL[periodicity]
+        windowed = text(
+            _STREAK_ISLANDS_SQL.format(period=period, window=" AND completed_at >= :since")
+            + last_island
+        ).bindparams(bindparam("since", type_=DateTime))
+        
+        with get_session_scope(session) as session:
+            start_period, last_period, length = session.execute(
+                windowed, {"habit_id": habit_id, "since": since}
+            ).one()
+            
+            # A streak starting at the window edge may extend further back
+            if start_period == first_period:
+                full = text(_STREAK_ISLANDS_SQL.format(period=period, window="") + last_island)
+                start_period, last_period, length = session.execute(
+                    full, {"habit_id": habit_id}
+                ).one()
+        
+        if last_period is None:
+            return 0
+        
+        # The streak must reach the current period (or the next one, for
+        # completions logged ahead of end_date)
+        return length if last_period in (current_period, current_period + 1) else 0
+    
+    def longest_streak(self, habit_id: int, periodicity: Periodicity,
+                       session: Session = None) -> int:
+        """
+        Calculate the longest streak a habit ever reached inside the database.
+        
+        Args:
+            habit_id: The habit ID
+            periodicity: Whether the habit is daily or weekly
+            session: Optional existing database session
+            
+        Returns:
+            The longest streak length achieved
+        """
+        statement = text(_STREAK_ISLANDS_SQL.format(period=_PERIOD_SQL[periodicity], window="") + """
+            SELECT COALESCE(MAX(length), 0)
+            FROM (SELECT COUNT(*) AS length FROM islands GROUP BY island)
+        """)
+        
+        with get_session_scope(session) as session:
+            return session.execute(statement, {"habit_id": habit_id}).scalar()
+    
+    def top_longest_streak(self, session: Session = None) -> Optional[Tuple[int, int]]:
+        """
+        Find the habit with the longest streak without returning the others.
+        
+        Ranks the per-habit streaks in SQL; ties go to the habit created
+        first, as when scanning habits in creation order.
+        
+        Args:
+            session: Optional existing database session
+            
+        Returns:
+            Tuple of (habit_id, longest_streak), or None if there are no
+            completions
+        """
+        statement = text(_LONGEST_STREAKS_CTE + """
+            SELECT streaks.habit_id, streaks.streak
+            FROM streaks
+            JOIN habits ON habits.id = streaks.habit_id
+            ORDER BY streaks.streak DESC, habits.created_at, habits.id
+            LIMIT 1
+        """)
+        
+        with get_session_scope(session) as session:
+            row = session.execute(statement).first()
+            return tuple(row) if row else None
+    
+    def delete(self, completion: Completion, session: Session = None) -> bool:
         """
         Delete a completion from the database.
         
         Args:
             completion: The completion to delete
+            session: Optional existing database session
             
         Returns:
             True if deleted successfully
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             if completion.id:
                 session.delete(session.merge(completion))
                 return True
@@ -0,0 +1,37 @@
+"""
+Custom column types for the Habit Tracker application.
+
+This module contains SQLAlchemy type decorators used by the models.
+"""
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+from .enums import Periodicity
+
+
+class PeriodicityType(TypeDecorator):
+    """
+    Store a Periodicity as a small integer code instead of its name.
+    
+    The column holds 0 for daily and 1 for weekly, which is narrower than the
+    enum name and compares as a single integer. Python code keeps working with
+    Periodicity members.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    CODES = {Periodicity.DAILY: 0, Periodicity.WEEKLY: 1}
+    MEMBERS = {code: member for member, code in CODES.items()}
+    
+    def process_bind_param(self, value, dialect):
+        """Convert a Periodicity (or its value) to the stored integer code."""
+        if value is None:
+            return None
+        return self.CODES[Periodicity(value)]
+    
+    def process_result_value(self, value, dialect):
+        """Convert a stored integer code back to a Periodicity member."""
+        if value is None:
+            return None
+        return self.MEMBERS[int(value)]
@@ -7,14 +7,11 @@ and 4 weeks of sample completion events as requested in the feedback.
 These fixtures are committed and will be reused for testing and demos.
 """
 
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from typing import List, Dict, Tuple
 
-# Import Periodicity directly from enums
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from habit_tracker.core.models.enums import Periodicity
 
 
@@ -57,6 +54,48 @@ PREDEFINED_HABITS = [
     }
 ]
 
+# Periodicities a predefined habit may use
+_ALLOWED_PERIODICITIES = frozenset({Periodicity.DAILY, Periodicity.WEEKLY})
+
+
+# Static completion patterns as offsets from midnight of the first day, built
+# once at import. Only the 4-week window they are placed in depends on the clock.
+
+# HABIT_DRINK_WATER - Very consistent daily habit (90% completion rate)
+# Pattern: Only misses days 5, 13 and 22; morning routine with slight time variation
+_WATER_OFFSETS = tuple(
+    timedelta(days=day, hours=8, minutes=30 + (day % 30))
+    for day in range(28) if day not in {5, 13, 22}
+)
+
+# HABIT_READ_BOOKS - Good daily habit with some breaks (75% completion rate)
+# Pattern: Takes weekends off occasionally, misses 7 days total; evening reading
+_READING_OFFSETS = tuple(
+    timedelta(days=day, hours=20, minutes=15 + (day % 45)) for day in range(28)
+    if day not in {6, 7, 12, 15, 19, 20, 21}
+)
+
+# HABIT_EXERCISE - Moderate daily habit (65% completion rate)
+# Pattern: More inconsistent, misses 11 days; alternates morning/evening
+_EXERCISE_OFFSETS = tuple(
+    timedelta(days=day, hours=7 if day % 2 == 0 else 18, minutes=day % 20)
+    for day in range(28)
+    if day not in {1, 3, 6, 8, 11, 14, 16, 18, 20, 24, 26}
+)
+
+# HABIT_WEEKLY_PLANNING - Completes weeks 1, 2 and 4 (75%) on Sundays at 10:00
+# HABIT_DEEP_CLEAN - Completes all 4 weeks (100%) on Saturdays at 14:30
+# Weekly offsets are relative to the first matching weekday in the window
+_PLANNING_OFFSETS = tuple(timedelta(weeks=week, hours=10) for week in (0, 1, 3))
+_CLEANING_OFFSETS = tuple(
+    timedelta(weeks=week, hours=14, minutes=30) for week in (0, 1, 2, 3)
+)
+
+
+def _materialize(offsets: Tuple[timedelta, ...], start_day: datetime) -> Tuple[datetime, ...]:
+    """Turn precomputed offsets into datetimes from start_day."""
+    return tuple(map(start_day.__add__, offsets))
+
 
 def generate_four_weeks_sample_events() -> Dict[str, List[datetime]]:
     """
@@ -64,114 +103,75 @@ def generate_four_weeks_sample_events() -> Dict[str, List[datetime]]:
     
     This creates realistic completion patterns that will be reused for testing and demos.
     The patterns are designed to show various streak lengths and completion rates.
+    The events only depend on today's date, so they are built once per day and
+    callers receive fresh lists they may modify.
     
     Returns:
         Dictionary mapping habit names to lists of completion datetimes
     """
-    # Calculate the date range for exactly 4 weeks (28 days)
-    end_date = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-    start_date = end_date - timedelta(days=27)  # 28 days total (0-27)
-    
-    # Define realistic completion patterns for each habit
-    completion_events = {}
-    
-    # HABIT_DRINK_WATER - Very consistent daily habit (90% completion rate)
-    # Pattern: Only misses 2-3 days over 4 weeks
-    water_completions = []
-    missed_days = {5, 13, 22}  # Miss days 5, 13, and 22
-    
-    for day in range(28):
-        if day not in missed_days:
-            completion_time = start_date + timedelta(days=day)
-            # Vary the time of completion (morning routine)
-            completion_time = completion_time.replace(
-                hour=8, 
-                minute=30 + (day % 30),  # Slight time variation
-                second=0
-            )
-            water_completions.append(completion_time)
-    
-    completion_events[HABIT_DRINK_WATER] = water_completions
-    
-    # HABIT_READ_BOOKS - Good daily habit with some breaks (75% completion rate)
-    # Pattern: Takes weekends off occasionally, misses 7 days total
-    reading_completions = []
-    missed_days = {6, 7, 12, 15, 19, 20, 21}  # Miss 7 days
-    
-    for day in range(28):
-        if day not in missed_days:
-            completion_time = start_date + timedelta(days=day)
-            # Evening reading time
-            completion_time = completion_time.replace(
-                hour=20,
-                minute=15 + (day % 45),
-                second=0
-            )
-            reading_completions.append(completion_time)
-    
-    completion_events[HABIT_READ_BOOKS] = reading_completions
-    
-    # HABIT_EXERCISE - Moderate daily habit (65% completion rate)
-    # Pattern: More inconsistent, misses about 1/3 of days
-    exercise_completions = []
-    missed_days = {1, 3, 6, 8, 11, 14, 16, 18, 20, 24, 26}  # Miss 11 days
-    
-    for day in range(28):
-        if day not in missed_days:
-            completion_time = start_date + timedelta(days=day)
-            # Morning or evening exercise
-            hour = 7 if day % 2 == 0 else 18  # Alternate morning/evening
-            completion_time = completion_time.replace(
-                hour=hour,
-                minute=0 + (day % 20),
-                second=0
-            )
-            exercise_completions.append(completion_time)
-    
-    completion_events[HABIT_EXERCISE] = exercise_completions
-    
-    # HABIT_WEEKLY_PLANNING - Very consistent weekly habit
-    # Pattern: Completes 3 out of 4 weeks (75% completion rate)
-    planning_completions = []
-    
-    # Complete in weeks 1, 2, and 4 (miss week 3)
-    completed_weeks = [0, 1, 3]  # Week indices
-    
-    for week in completed_weeks:
-        # Complete on Sunday of each week (day 6 of the week)
-        week_start = start_date + timedelta(weeks=week)
-        # Find the Sunday of this week (adjust for start_date's day of week)
-        days_to_sunday = (6 - week_start.weekday()) % 7
-        completion_time = week_start + timedelta(days=days_to_sunday)
-        completion_time = completion_time.replace(
-            hour=10,
-            minute=0,
-            second=0
-        )
-        planning_completions.append(completion_time)
-    
-    completion_events[HABIT_WEEKLY_PLANNING] = planning_completions
-    
-    # HABIT_DEEP_CLEAN - Consistent weekly habit
-    # Pattern: Completes all 4 weeks (100% completion rate)
-    cleaning_completions = []
-    
-    for week in range(4):
-        # Complete on Saturday of each week
-        week_start = start_date + timedelta(weeks=week)
-        # Find the Saturday of this week
-        days_to_saturday = (5 - week_start.weekday()) % 7
-        completion_time = week_start + timedelta(days=days_to_saturday)
-        completion_time = completion_time.replace(
-            hour=14,  # Afternoon cleaning
-            minute=30,
-            second=0
-        )
-        cleaning_completions.append(completion_time)
-    
-    completion_events[HABIT_DEEP_CLEAN] = cleaning_completions
+    events = _generate_four_weeks_sample_events(date.today())
+    return {name: list(completions) for name, completions in events.items()}
+
+
+@lru_cache(maxsize=1)
+def _generate_four_weeks_sample_events(end_day: date) -> Dict[str, Tuple[datetime, ...]]:
+    """Build the sample events for the 4 weeks ending on end_day."""
+    # Calculate the date range for exactly 4 weeks (28 days), built directly
+    # at midnight of the first day
+    first_day = end_day - timedelta(days=27)  # 28 days total (0-27)
+    start_day = datetime.combine(first_day, time.min)
+    
+    # Weekly habits land on a fixed weekday, so their offsets depend on the
+    # weekday the window starts on
+    days_to_sunday = (6 - first_day.weekday()) % 7
+    days_to_saturday = (5 - first_day.weekday()) % 7
     
-    return completion_events
+    return {
+        HABIT_DRINK_WATER: _materialize(_WATER_OFFSETS, start_day),
+        HABIT_READ_BOOKS: _materialize(_READING_OFFSETS, start_day),
+        HABIT_EXERCISE: _materialize(_EXERCISE_OFFSETS, start_day),
+        HABIT_WEEKLY_PLANNING: _materialize(
+            _PLANNING_OFFSETS, start_day + timedelta(days=days_to_sunday)
+        ),
+        HABIT_DEEP_CLEAN: _materialize(
+            _CLEANING_OFFSETS, start_day + timedelta(days=days_to_saturday)
+        ),
+    }
+
+
+# Expected statistics for the predefined habits with 4 weeks of sample data
+_EXPECTED_STATISTICS = {
+    HABIT_DRINK_WATER: {
+        'total_completions': 25,  # 28 - 3 missed days
+        'completion_rate': 89.3,  # 25/28 * 100
+        'expected_longest_streak': 12,  # Days 0-4, 6-12 (longest consecutive)
+        'periodicity': 'daily'
+    },
+    HABIT_READ_BOOKS: {
+        'total_completions': 21,  # 28 - 7 missed days
+        'completion_rate': 75.0,  # 21/28 * 100
+        'expected_longest_streak': 5,   # Longest consecutive period
+        'periodicity': 'daily'
+    },
+    HABIT_EXERCISE: {
+        'total_completions': 17,  # 28 - 11 missed days
+        'completion_rate': 60.7,  # 17/28 * 100
+        'expected_longest_streak': 3,   # Shorter streaks due to inconsistency
+        'periodicity': 'daily'
+    },
+    HABIT_WEEKLY_PLANNING: {
+        'total_completions': 3,   # 3 out of 4 weeks
+        'completion_rate': 75.0,  # 3/4 * 100
+        'expected_longest_streak': 2,   # Weeks 1-2 consecutive
+        'periodicity': 'weekly'
+    },
+    HABIT_DEEP_CLEAN: {
+        'total_completions': 4,   # All 4 weeks
+        'completion_rate': 100.0, # 4/4 * 100
+        'expected_longest_streak': 4,   # All weeks consecutive
+        'periodicity': 'weekly'
+    }
+}
 
 
 def get_expected_statistics() -> Dict[str, Dict[str, any]]:
@@ -179,42 +179,13 @@ def get_expected_statistics() -> Dict[str, Dict[str, any]]:
     Get the expected statistics for the predefined habits with 4 weeks of data.
     
     This is useful for validation and testing to ensure the fixtures are correct.
+    The table is static, so it is built once at import; each call returns
+    fresh per-habit dicts that callers may modify.
     
     Returns:
         Dictionary with expected statistics for each habit
     """
-    return {
-        HABIT_DRINK_WATER: {
-            'total_completions': 25,  # 28 - 3 missed days
-            'completion_rate': 89.3,  # 25/28 * 100
-            'expected_longest_streak': 12,  # Days 0-4, 6-12 (longest consecutive)
-            'periodicity': 'daily'
-        },
-        HABIT_READ_BOOKS: {
-            'total_completions': 21,  # 28 - 7 missed days
-            'completion_rate': 75.0,  # 21/28 * 100
-            'expected_longest_streak': 5,   # Longest consecutive period
-            'periodicity': 'daily'
-        },
-        HABIT_EXERCISE: {
-            'total_completions': 17,  # 28 - 11 missed days
-            'completion_rate': 60.7,  # 17/28 * 100
-            'expected_longest_streak': 3,   # Shorter streaks due to inconsistency
-            'periodicity': 'daily'
-        },
-        HABIT_WEEKLY_PLANNING: {
-            'total_completions': 3,   # 3 out of 4 weeks
-            'completion_rate': 75.0,  # 3/4 * 100
-            'expected_longest_streak': 2,   # Weeks 1-2 consecutive
-            'periodicity': 'weekly'
-        },
-        HABIT_DEEP_CLEAN: {
-            'total_completions': 4,   # All 4 weeks
-            'completion_rate': 100.0, # 4/4 * 100
-            'expected_longest_streak': 4,   # All weeks consecutive
-            'periodicity': 'weekly'
-        }
-    }
+    return {name: dict(stats) for name, stats in _EXPECTED_STATISTICS.items()}
 
 
 def validate_fixture_data() -> bool:
@@ -230,39 +201,36 @@ def validate_fixture_data() -> bool:
     # Check exactly 5 habits
     assert len(PREDEFINED_HABITS) == 5, f"Expected 5 habits, got {len(PREDEFINED_HABITS)}"
     
-    # Check at least 1 daily and 1 weekly
-    daily_count = sum(1 for h in PREDEFINED_HABITS if h['periodicity'] == Periodicity.DAILY)
-    weekly_count = sum(1 for h in PREDEFINED_HABITS if h['periodicity'] == Periodicity.WEEKLY)
-    
-    assert daily_count >= 1, f"Expected at least 1 daily habit, got {daily_count}"
-    assert weekly_count >= 1, f"Expected at least 1 weekly habit, got {weekly_count}"
-    
-    # Check all habits have required fields
+    # Check all habits have required fields, tallying periodicities in the same pass
     required_fields = ['name', 'description', 'periodicity']
+    counts = Counter()
     for habit in PREDEFINED_HABITS:
         for field in required_fields:
             assert field in habit, f"Habit missing required field: {field}"
         assert isinstance(habit['name'], str) and habit['name'], "Habit name must be non-empty string"
         assert isinstance(habit['description'], str) and habit['description'], "Habit description must be non-empty string"
-        assert habit['periodicity'] in [Periodicity.DAILY, Periodicity.WEEKLY], "Invalid periodicity"
+        assert habit['periodicity'] in _ALLOWED_PERIODICITIES, "Invalid periodicity"
+        counts[habit['periodicity']] += 1
+    
+    # Check at least 1 daily and 1 weekly
+    daily_count = counts[Periodicity.DAILY]
+    weekly_count = counts[Periodicity.WEEKLY]
+    
+    assert daily_count >= 1, f"Expected at least 1 daily habit, got {daily_count}"
+    assert weekly_count >= 1, f"Expected at least 1 weekly habit, got {weekly_count}"
     
     # Check 4 weeks of sample events
     events = generate_four_weeks_sample_events()
     
     # Check events exist for all habits
-    habit_names = [h['name'] for h in PREDEFINED_HABITS]
-    for name in habit_names:
-        assert name in events, f"Missing events for habit: {name}"
-    
-    # Check date ranges (4 weeks = 28 days)
-    # Use the same end_date as in the fixture generation
-    end_date = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
-    start_date = end_date - timedelta(days=27)
+    for habit in PREDEFINED_HABITS:
+        assert habit['name'] in events, f"Missing events for habit: {habit['name']}"
     
-    # Make the start_date more lenient (start of the start day)
-    start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    # Make the end_date more lenient (end of the end day)
-    extended_end_date = end_date.replace(hour=23, minute=59, second=59, microsecond=999999)
+    # Check date ranges (4 weeks = 28 days), leniently from the start of the
+    # first day to the end of today, as in the fixture generation
+    today = date.today()
+    start_date = datetime.combine(today - timedelta(days=27), time.min)
+    extended_end_date = datetime.combine(today, time.max)
     
     for habit_name, completions in events.items():
         for completion in completions:
@@ -282,8 +250,11 @@ if __name__ == "__main__":
     print("=" * 50)
     print(f"Total habits: {len(PREDEFINED_HABITS)}")
     
-    daily_habits = [h for h in PREDEFINED_HABITS if h['periodicity'] == Periodicity.DAILY]
-    weekly_habits = [h for h in PREDEFINED_HABITS if h['periodicity'] == Periodicity.WEEKLY]
+    habits_by_periodicity = {Periodicity.DAILY: [], Periodicity.WEEKLY: []}
+    for habit in PREDEFINED_HABITS:
+        habits_by_periodicity[habit['periodicity']].append(habit)
+    daily_habits = habits_by_periodicity[Periodicity.DAILY]
+    weekly_habits = habits_by_periodicity[Periodicity.WEEKLY]
     
     print(f"Daily habits: {len(daily_habits)}")
     for habit in daily_habits:
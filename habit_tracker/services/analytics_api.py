@@ -16,7 +16,25 @@ from datetime import datetime
 
 from ..core.models import Habit, Completion, Periodicity
 from ..core.models.repository import habit_repository, completion_repository
-from .analytics_service import calculate_longest_streak
+from ..core.database import get_session_scope
+from .analytics_service import calculate_longest_streak, calculate_streak, calculate_streaks
+
+
+# Accepted periodicity strings (lower-cased) and the enum members they name
+_PERIODICITY_MAP = {member.value: member for member in Periodicity}
+
+
+def _parse_periodicity(periodicity: str) -> Periodicity:
+    """
+    Map a 'daily'/'weekly' string (any case) to its Periodicity member.
+    
+    Raises:
+        ValueError: If periodicity is not 'daily' or 'weekly'
+    """
+    try:
+        return _PERIODICITY_MAP[periodicity.lower()]
+    except KeyError:
+        raise ValueError("Periodicity must be 'daily' or 'weekly'") from None
 
 
 def list_all_habits() -> List[Dict[str, any]]:
@@ -34,13 +52,17 @@ def list_all_habits() -> List[Dict[str, any]]:
                 'description': 'Drink 8 glasses daily',
                 'periodicity': 'daily',
                 'created_at': '2024-01-01T00:00:00',
-                'completion_count': 25
+                'completion_count': 25,
+                'last_completed': '2024-01-25T09:30:00'
             },
             ...
         ]
     """
-    habits = habit_repository.find_all()
-    return [habit.to_dict() for habit in habits]
+    rows = habit_repository.find_summaries()
+    return [
+        Habit.row_to_dict(row, row.completion_count, {'last_completed': row.last_completed})
+        for row in rows
+    ]
 
 
 def list_by_periodicity(periodicity: str) -> List[Dict[str, any]]:
@@ -60,12 +82,12 @@ def list_by_periodicity(periodicity: str) -> List[Dict[str, any]]:
         list_by_periodicity('daily') returns all daily habits
         list_by_periodicity('weekly') returns all weekly habits
     """
-    if periodicity.lower() not in ['daily', 'weekly']:
-        raise ValueError("Periodicity must be 'daily' or 'weekly'")
-    
-    period_enum = Periodicity.DAILY if periodicity.lower() == 'daily' else Periodicity.WEEKLY
-    habits = habit_repository.find_by_periodicity(period_enum)
-    return [habit.to_dict() for habit in habits]
+    period_enum = _parse_periodicity(periodicity)
+    rows = habit_repository.find_summaries(period_enum)
+    return [
+        Habit.row_to_dict(row, row.completion_count, {'last_completed': row.last_completed})
+        for row in rows
+    ]
 
 
 def longest_streak_overall() -> Tuple[Optional[str], int, str]:
@@ -80,25 +102,17 @@ def longest_streak_overall() -> Tuple[Optional[str], int, str]:
         ('Drink Water', 15, 'daily') means "Drink Water" has the longest streak of 15 days
         ('Weekly Review', 8, 'weekly') means "Weekly Review" has the longest streak of 8 weeks
     """
-    habits = habit_repository.find_all()
-    
-    if not habits:
-        return None, 0, ''
-    
-    max_streak = 0
-    best_habit_name = None
-    best_periodicity = ''
-    
-    for habit in habits:
-        completions = completion_repository.find_by_habit_id(habit.id)
-        longest_streak = calculate_longest_streak(completions, habit.periodicity)
+    with get_session_scope() as session:
+        # Only the leading habit is ranked out of SQL and loaded
+        top = completion_repository.top_longest_streak(session=session)
+        
+        if top is None:
+            return None, 0, ''
         
-        if longest_streak > max_streak:
-            max_streak = longest_streak
-            best_habit_name = habit.name
-            best_periodicity = habit.periodicity.value
+        habit_id, max_streak = top
+        habit = habit_repository.find_by_id(habit_id, session=session)
     
-    return best_habit_name, max_streak, best_periodicity
+    return habit.name, max_streak, habit.periodicity.value
 
 
 def longest_streak_for(habit_id: int) -> Tuple[int, str]:
@@ -116,12 +130,14 @@ def longest_streak_for(habit_id: int) -> Tuple[int, str]:
         longest_streak_for(1) returns (12, 'daily') for habit ID 1 with 12-day streak
         longest_streak_for(2) returns (5, 'weekly') for habit ID 2 with 5-week streak
     """
-    habit = habit_repository.find_by_id(habit_id)
-    
-    if not habit:
-        return 0, ''
+    with get_session_scope() as session:
+        habit = habit_repository.find_by_id(habit_id, session=session)
+        
+        if not habit:
+            return 0, ''
+        
+        completions = completion_repository.find_dates_by_habit_id(habit.id, session=session)
     
-    completions = completion_repository.find_by_habit_id(habit.id)
     longest_streak = calculate_longest_streak(completions, habit.periodicity)
     
     return longest_streak, habit.periodicity.value
@@ -152,22 +168,23 @@ def get_habit_statistics(habit_id: int) -> Dict[str, any]:
             'last_completion': '2024-01-25T09:30:00'
         }
     """
-    habit = habit_repository.find_by_id(habit_id)
-    
-    if not habit:
-        return {}
-    
-    completions = completion_repository.find_by_habit_id(habit.id)
+    with get_session_scope() as session:
+        habit = habit_repository.find_by_id(habit_id, session=session)
+        
+        if not habit:
+            return {}
+        
+        completions = completion_repository.find_times_by_habit_id(habit.id, session=session)
     
-    from .analytics_service import calculate_streak
+    current_streak, longest_streak = calculate_streaks(completions, habit.periodicity)
     
     stats = {
         'habit_id': habit.id,
         'habit_name': habit.name,
         'periodicity': habit.periodicity.value,
         'total_completions': len(completions),
-        'longest_streak': calculate_longest_streak(completions, habit.periodicity),
-        'current_streak': calculate_streak(completions, habit.periodicity),
+        'longest_streak': longest_streak,
+        'current_streak': current_streak,
         'created_at': habit.created_at.isoformat() if habit.created_at else None,
         'first_completion': completions[-1].completed_at.isoformat() if completions else None,
         'last_completion': completions[0].completed_at.isoformat() if completions else None
@@ -195,22 +212,31 @@ def get_all_habits_with_streaks() -> List[Dict[str, any]]:
             ...
         ]
     """
-    habits = habit_repository.find_all()
     result = []
     
-    from .analytics_service import calculate_streak
+    # One clock reading for the whole report, so every habit's streak refers
+    # to the same moment
+    now = datetime.now()
     
-    for habit in habits:
-        completions = completion_repository.find_by_habit_id(habit.id)
+    with get_session_scope() as session:
+        habits = habit_repository.find_all(session=session)
+        # Plain timestamp rows are enough for the streak walk; no Completion
+        # objects are built
+        completions_by_habit = completion_repository.find_times_by_habit_ids(session=session)
         
-        habit_data = {
-            'id': habit.id,
-            'name': habit.name,
-            'periodicity': habit.periodicity.value,
-            'current_streak': calculate_streak(completions, habit.periodicity),
-            'longest_streak': calculate_longest_streak(completions, habit.periodicity)
-        }
-        result.append(habit_data)
+        for habit in habits:
+            current_streak, longest_streak = calculate_streaks(
+                completions_by_habit.get(habit.id, []), habit.periodicity, now
+            )
+            
+            habit_data = {
+                'id': habit.id,
+                'name': habit.name,
+                'periodicity': habit.periodicity.value,
+                'current_streak': current_streak,
+                'longest_streak': longest_streak
+            }
+            result.append(habit_data)
     
     return result
 
@@ -229,15 +255,12 @@ def count_habits_by_periodicity() -> Dict[str, int]:
             'total': 5
         }
     """
-    habits = habit_repository.find_all()
-    
-    daily_count = sum(1 for habit in habits if habit.periodicity == Periodicity.DAILY)
-    weekly_count = sum(1 for habit in habits if habit.periodicity == Periodicity.WEEKLY)
+    counts = habit_repository.count_by_periodicity()
     
     return {
-        'daily': daily_count,
-        'weekly': weekly_count,
-        'total': len(habits)
+        'daily': counts.get(Periodicity.DAILY, 0),
+        'weekly': counts.get(Periodicity.WEEKLY, 0),
+        'total': sum(counts.values())
     }
 
 
@@ -255,28 +278,35 @@ def find_habits_with_streak_above(minimum_streak: int, periodicity: str = None)
     Example:
         find_habits_with_streak_above(7, 'daily') returns daily habits with 7+ day streaks
     """
-    habits = habit_repository.find_all()
-    
     if periodicity:
-        if periodicity.lower() not in ['daily', 'weekly']:
-            raise ValueError("Periodicity must be 'daily' or 'weekly'")
-        period_enum = Periodicity.DAILY if periodicity.lower() == 'daily' else Periodicity.WEEKLY
-        habits = [h for h in habits if h.periodicity == period_enum]
+        period_enum = _parse_periodicity(periodicity)
     
     result = []
-    from .analytics_service import calculate_streak
     
-    for habit in habits:
-        completions = completion_repository.find_by_habit_id(habit.id)
-        current_streak = calculate_streak(completions, habit.periodicity)
+    now = datetime.now()
+    
+    with get_session_scope() as session:
+        if periodicity:
+            habits = habit_repository.find_by_periodicity(period_enum, session=session)
+        else:
+            habits = habit_repository.find_all(session=session)
         
-        if current_streak >= minimum_streak:
-            result.append({
-                'id': habit.id,
-                'name': habit.name,
-                'periodicity': habit.periodicity.value,
-                'current_streak': current_streak
-            })
+        completions_by_habit = completion_repository.find_times_by_habit_ids(
+            [habit.id for habit in habits], session=session
+        )
+        
+        for habit in habits:
+            current_streak = calculate_streak(
+                completions_by_habit.get(habit.id, []), habit.periodicity, now
+            )
+            
+            if current_streak >= minimum_streak:
+                result.append({
+                    'id': habit.id,
+                    'name': habit.name,
+                    'periodicity': habit.periodicity.value,
+                    'current_streak': current_streak
+                })
     
     return result
 
@@ -7,20 +7,135 @@ principles with pure functions.
 """
 
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Tuple, Optional
-from collections import defaultdict
+from typing import List, Dict, Set, Tuple, Optional
+from collections import Counter
+from itertools import takewhile
+from operator import attrgetter
 
+from sqlalchemy.orm import Session
+
+from ..config.settings import Settings
 from ..core.models import Habit, Completion, Periodicity
+from ..core.models.repository import completion_repository, habit_repository
+from ..core.database import get_session_scope
 from .habit_service import HabitService
 
 
+# Reads completed_at from completions and row tuples alike
+_completed_at = attrgetter("completed_at")
+
+
+def _period_index(day: date, periodicity: Periodicity) -> int:
+    """
+    Map a date to an integer index of its period.
+    
+    Consecutive days (or consecutive Monday-based weeks) map to consecutive
+    integers, so streak checks become plain integer comparisons.
+    """
+    ordinal = day.toordinal()
+    if periodicity == Periodicity.DAILY:
+        return ordinal
+    # date.fromordinal(1) is a Monday, so this buckets ordinals into ISO weeks
+    return (ordinal - 1) // 7
+
+
+def _period_set(completions: List[Completion], periodicity: Periodicity) -> Set[int]:
+    """
+    Get the distinct period indices covered by completions.
+    
+    Args:
+        completions: Completion records (or rows exposing ``completed_at``)
+        periodicity: Whether the habit is daily or weekly
+        
+    Returns:
+        Set of unique period indices
+    """
+    # map() over C-level callables keeps the per-row loop out of Python
+    # bytecode; date.toordinal accepts datetimes and the date rows of
+    # find_dates_by_habit_id alike. Days are deduplicated before being
+    # bucketed into weeks.
+    ordinals = set(map(date.toordinal, map(_completed_at, completions)))
+    if periodicity != Periodicity.DAILY:
+        ordinals = {(ordinal - 1) // 7 for ordinal in ordinals}
+    return ordinals
+
+
+def _period_indices(completions: List[Completion], periodicity: Periodicity) -> List[int]:
+    """
+    Get the distinct period indices covered by completions, in ascending order.
+    
+    The input order is not relied on. Rows from the repository already arrive
+    ordered by ``completed_at``, but sorting the few distinct periods is cheaper
+    than a Python pass that trusts that order, so callers never need to pre-sort.
+    
+    Args:
+        completions: Completion records (or rows exposing ``completed_at``)
+        periodicity: Whether the habit is daily or weekly
+        
+    Returns:
+        Sorted list of unique period indices
+    """
+    return sorted(_period_set(completions, periodicity))
+
+
+# Widest period range (about ten years of days) packed into a bitset by
+# _longest_run; sparser histories fall back to sorting
+_BITSET_MAX_SPAN = 3660
+
+
+def _longest_run(periods: Set[int]) -> int:
+    """
+    Get the length of the longest run of consecutive period indices.
+    
+    Args:
+        periods: Non-empty set of period indices
+        
+    Returns:
+        The longest number of consecutive periods
+    """
+    low = min(periods)
+    span = max(periods) - low + 1
+    if span > _BITSET_MAX_SPAN:
+        # Gaps-and-islands, as in the SQL streak queries: consecutive periods
+        # share the same period - position, so the longest run is the most
+        # common key
+        ordered = sorted(periods)
+        return max(Counter(period - i for i, period in enumerate(ordered)).values())
+    
+    # One bit per period in the range, parsed from a digit string in a single
+    # linear pass (the bit order is reversed, which run lengths ignore)
+    digits = bytearray(b'0') * span
+    for period in periods:
+        digits[period - low] = 49  # ord('1')
+    mask = int(digits, 2)
+    
+    # Invariant: a set bit starts a run of at least `longest` periods. Double
+    # the length while such runs remain, then binary-search the remainder.
+    longest = 1
+    runs = mask & (mask >> longest)
+    while runs:
+        mask = runs
+        longest *= 2
+        runs = mask & (mask >> longest)
+    
+    step = longest // 2
+    while step:
+        runs = mask & (mask >> step)
+        if runs:
+            mask = runs
+            longest += step
+        step //= 2
+    
+    return longest
+
+
 def calculate_streak(completions: List[Completion], periodicity: Periodicity, 
                     end_date: datetime = None) -> int:
     """
     Calculate the current streak for a habit based on its completions.
     
     Args:
-        completions: List of completion records, should be sorted by date desc
+        completions: List of completion records, in any order
         periodicity: Whether the habit is daily or weekly
         end_date: Optional end date for streak calculation. Defaults to today.
         
@@ -33,47 +148,28 @@ def calculate_streak(completions: List[Completion], periodicity: Periodicity,
     if end_date is None:
         end_date = datetime.now()
     
-    # Convert completions to dates for easier calculation
-    completion_dates = [comp.completed_at.date() for comp in completions]
-    completion_dates.sort(reverse=True)  # Most recent first
+    # _period_index only needs toordinal(), which datetimes provide directly
+    current_period = _period_index(end_date, periodicity)
     
-    streak = 0
-    current_date = end_date.date()
+    # A single completion (e.g. a habit's first check-off) needs no set
+    if len(completions) == 1:
+        period = _period_index(completions[0].completed_at, periodicity)
+        return 1 if period in (current_period, current_period + 1) else 0
     
-    if periodicity == Periodicity.DAILY:
-        # For daily habits, check consecutive days
-        for completion_date in completion_dates:
-            if completion_date == current_date:
-                streak += 1
-                current_date -= timedelta(days=1)
-            elif completion_date == current_date + timedelta(days=1):
-                # Allow for today not being completed yet
-                streak += 1
-                current_date = completion_date - timedelta(days=1)
-            else:
-                break
-    else:  # WEEKLY
-        # For weekly habits, check consecutive weeks
-        # Find the start of the current week (Monday)
-        days_since_monday = current_date.weekday()
-        current_week_start = current_date - timedelta(days=days_since_monday)
-        
-        for completion_date in completion_dates:
-            # Find the start of the completion week
-            comp_days_since_monday = completion_date.weekday()
-            comp_week_start = completion_date - timedelta(days=comp_days_since_monday)
-            
-            if comp_week_start == current_week_start:
-                streak += 1
-                current_week_start -= timedelta(weeks=1)
-            elif comp_week_start == current_week_start + timedelta(weeks=1):
-                # Allow for current week not being completed yet
-                streak += 1
-                current_week_start = comp_week_start - timedelta(weeks=1)
-            else:
-                break
-    
-    return streak
+    periods = _period_set(completions, periodicity)
+    
+    # The streak must reach the current period (or the next one, for
+    # completions logged ahead of end_date)
+    last_period = max(periods)
+    if last_period not in (current_period, current_period + 1):
+        return 0
+    
+    # Walk back through consecutive periods; no sort is needed
+    period = last_period - 1
+    while period in periods:
+        period -= 1
+    
+    return last_period - period
 
 
 def calculate_longest_streak(completions: List[Completion], periodicity: Periodicity) -> int:
@@ -81,121 +177,232 @@ def calculate_longest_streak(completions: List[Completion], periodicity: Periodi
     Calculate the longest streak ever achieved for a habit.
     
     Args:
-        completions: List of completion records
+        completions: List of completion records, in any order
         periodicity: Whether the habit is daily or weekly
         
     Returns:
         The longest streak length achieved
     """
-    if not completions:
-        return 0
+    if len(completions) <= 1:
+        return len(completions)
     
-    # Convert to dates and sort chronologically
-    completion_dates = [comp.completed_at.date() for comp in completions]
-    completion_dates = sorted(set(completion_dates))  # Remove duplicates and sort
-    
-    if not completion_dates:
-        return 0
+    return _longest_run(_period_set(completions, periodicity))
+
+
+def calculate_streaks(completions: List[Completion], periodicity: Periodicity,
+                      end_date: datetime = None) -> Tuple[int, int]:
+    """
+    Calculate the current and the longest streak together.
     
-    longest_streak = 1
-    current_streak = 1
+    For callers that need both: the periods are deduplicated and sorted once
+    and a single pass assigns every run its island key, instead of running
+    ``calculate_streak`` and ``calculate_longest_streak`` back to back.
     
-    if periodicity == Periodicity.DAILY:
-        # Check for consecutive days
-        for i in range(1, len(completion_dates)):
-            if completion_dates[i] == completion_dates[i-1] + timedelta(days=1):
-                current_streak += 1
-                longest_streak = max(longest_streak, current_streak)
-            else:
-                current_streak = 1
-    else:  # WEEKLY
-        # Group completions by week and check consecutive weeks
-        weeks = set()
-        for comp_date in completion_dates:
-            # Find the start of the week (Monday)
-            days_since_monday = comp_date.weekday()
-            week_start = comp_date - timedelta(days=days_since_monday)
-            weeks.add(week_start)
-        
-        weeks = sorted(weeks)
-        if not weeks:
-            return 0
-        
-        current_streak = 1
-        longest_streak = 1
+    Args:
+        completions: List of completion records, in any order
+        periodicity: Whether the habit is daily or weekly
+        end_date: Optional end date for the current streak. Defaults to today.
         
-        for i in range(1, len(weeks)):
-            if weeks[i] == weeks[i-1] + timedelta(weeks=1):
-                current_streak += 1
-                longest_streak = max(longest_streak, current_streak)
-            else:
-                current_streak = 1
+    Returns:
+        Tuple of (current_streak, longest_streak)
+    """
+    if not completions:
+        return 0, 0
     
-    return longest_streak
+    if end_date is None:
+        end_date = datetime.now()
+    
+    periods = _period_indices(completions, periodicity)
+    run_lengths = Counter(period - i for i, period in enumerate(periods))
+    
+    # The last run is the current streak if it reaches the current period (or
+    # the next one, for completions logged ahead of end_date)
+    current_period = _period_index(end_date, periodicity)
+    current_streak = 0
+    if periods[-1] in (current_period, current_period + 1):
+        current_streak = run_lengths[periods[-1] - (len(periods) - 1)]
+    
+    return current_streak, max(run_lengths.values())
 
 
-def get_habit_statistics(habit: Habit) -> Dict[str, any]:
+def _build_statistics(habit: Habit, completions: List[Completion], total_completions: int,
+                      first_completion: Optional[datetime],
+                      last_completion: Optional[datetime],
+                      recent_completions: int, now: datetime) -> Dict[str, any]:
     """
-    Get comprehensive statistics for a single habit.
+    Assemble the statistics dictionary for a habit from already-loaded data.
     
     Args:
-        habit: The habit to analyze
+        habit: The habit to analyze, or a summary row exposing its columns
+        completions: Completion records (or rows exposing ``completed_at``)
+        total_completions: Number of completions for the habit
+        first_completion: Timestamp of the earliest completion, if any
+        last_completion: Timestamp of the most recent completion, if any
+        recent_completions: Completions within the default summary window
+        now: The current time the streaks and completion rate refer to
         
     Returns:
         Dictionary containing various statistics about the habit
     """
-    completions = HabitService.get_completions_for_habit(habit.id)
+    current_streak, longest_streak = calculate_streaks(completions, habit.periodicity, now)
     
     stats = {
         'habit_id': habit.id,
         'habit_name': habit.name,
         'periodicity': habit.periodicity.value,
         'created_at': habit.created_at,
-        'total_completions': len(completions),
-        'current_streak': calculate_streak(completions, habit.periodicity),
-        'longest_streak': calculate_longest_streak(completions, habit.periodicity),
-        'first_completion': completions[-1].completed_at if completions else None,
-        'last_completion': completions[0].completed_at if completions else None,
+        'total_completions': total_completions,
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'first_completion': first_completion,
+        'last_completion': last_completion,
+        'recent_completions': recent_completions,
     }
     
     # Calculate completion rate if habit has been active for more than 0 days
     if habit.created_at:
-        days_since_creation = (datetime.now() - habit.created_at).days + 1
+        days_since_creation = (now - habit.created_at).days + 1
         if habit.periodicity == Periodicity.DAILY:
             expected_completions = days_since_creation
         else:  # WEEKLY
             expected_completions = max(1, (days_since_creation + 6) // 7)  # Round up weeks
         
-        completion_rate = (len(completions) / expected_completions) * 100 if expected_completions > 0 else 0
+        completion_rate = (total_completions / expected_completions) * 100 if expected_completions > 0 else 0
         stats['completion_rate'] = min(100.0, completion_rate)  # Cap at 100%
         stats['expected_completions'] = expected_completions
     
     return stats
 
 
-def get_all_habits_statistics() -> List[Dict[str, any]]:
+def _build_summary_statistics(row, completions_by_habit: Dict[int, List[Completion]],
+                              now: datetime) -> Dict[str, any]:
+    """
+    Assemble the statistics dictionary for a ``habit_repository.find_summaries`` row.
+    
+    Args:
+        row: Summary row, queried with ``recent_since``
+        completions_by_habit: Completion rows grouped by habit ID, oldest first
+        now: The current time the streaks and completion rate refer to
+        
+    Returns:
+        Dictionary containing various statistics about the habit
+    """
+    return _build_statistics(
+        row, completions_by_habit.get(row.id, []), row.completion_count,
+        row.first_completed, row.last_completed, row.recent_count, now,
+    )
+
+
+def get_habit_statistics(habit: Habit, session: Session = None,
+                         now: datetime = None) -> Dict[str, any]:
+    """
+    Get comprehensive statistics for a single habit.
+    
+    Args:
+        habit: The habit to analyze
+        session: Optional existing database session
+        now: Optional current time, so one report uses a single clock
+             reading. Defaults to datetime.now().
+        
+    Returns:
+        Dictionary containing various statistics about the habit
+    """
+    with get_session_scope(session) as session:
+        completions = completion_repository.find_times_by_habit_id(habit.id, session=session)
+    
+    if now is None:
+        now = datetime.now()
+    recent_cutoff = now - timedelta(days=Settings.DEFAULT_SUMMARY_DAYS)
+    
+    return _build_statistics(
+        habit,
+        completions,
+        len(completions),
+        completions[-1].completed_at if completions else None,
+        completions[0].completed_at if completions else None,
+        sum(1 for comp in completions if comp.completed_at >= recent_cutoff),
+        now,
+    )
+
+
+def get_all_habits_statistics(session: Session = None, now: datetime = None) -> List[Dict[str, any]]:
     """
     Get statistics for all habits.
     
+    Uses one grouped aggregate query (counts and first/last completion per habit)
+    and one ordered query over all completion timestamps, so the number of
+    queries does not grow with the number of habits.
+    
+    Args:
+        session: Optional existing database session
+        now: Optional current time, so one report uses a single clock
+             reading. Defaults to datetime.now().
+        
     Returns:
         List of dictionaries containing statistics for each habit
     """
-    habits = HabitService.get_all_habits()
-    return [get_habit_statistics(habit) for habit in habits]
+    if now is None:
+        now = datetime.now()
+    recent_cutoff = now - timedelta(days=Settings.DEFAULT_SUMMARY_DAYS)
+    
+    with get_session_scope(session) as session:
+        summaries = habit_repository.find_summaries(recent_since=recent_cutoff, session=session)
+        completions_by_habit = completion_repository.find_times_by_habit_ids(session=session)
+    
+    return [_build_summary_statistics(row, completions_by_habit, now) for row in summaries]
 
 
-def get_habits_by_periodicity_with_stats(periodicity: Periodicity) -> List[Dict[str, any]]:
+def get_habits_by_periodicity_with_stats(periodicity: Periodicity, session: Session = None,
+                                         now: datetime = None) -> List[Dict[str, any]]:
     """
     Get habits of a specific periodicity with their statistics.
     
     Args:
         periodicity: The periodicity to filter by
+        session: Optional existing database session
+        now: Optional current time, so one report uses a single clock
+             reading. Defaults to datetime.now().
         
     Returns:
         List of dictionaries containing habit information and statistics
     """
-    habits = HabitService.get_habits_by_periodicity(periodicity)
-    return [get_habit_statistics(habit) for habit in habits]
+    if now is None:
+        now = datetime.now()
+    recent_cutoff = now - timedelta(days=Settings.DEFAULT_SUMMARY_DAYS)
+    
+    with get_session_scope(session) as session:
+        summaries = habit_repository.find_summaries(
+            periodicity, recent_since=recent_cutoff, session=session
+        )
+        completions_by_habit = completion_repository.find_times_by_habit_ids(
+            [row.id for row in summaries], session=session
+        )
+    
+    return [_build_summary_statistics(row, completions_by_habit, now) for row in summaries]
+
+
+def find_longest_streak_habit(session: Session = None) -> Tuple[Optional[Habit], int]:
+    """
+    Find the habit with the longest streak, returning the habit itself.
+    
+    The streaks are computed and ranked in SQL, and only the leading habit
+    is loaded, so callers that need the habit's periodicity do not have to
+    look it up again.
+    
+    Args:
+        session: Optional existing database session
+        
+    Returns:
+        Tuple of (habit, longest_streak_length)
+        Returns (None, 0) if no habit has any completions
+    """
+    with get_session_scope(session) as session:
+        top = completion_repository.top_longest_streak(session=session)
+        if top is None:
+            return None, 0
+        
+        habit_id, max_streak = top
+        return HabitService.get_habit_by_id(habit_id, session=session), max_streak
 
 
 def find_longest_streak_across_all_habits() -> Tuple[Optional[str], int]:
@@ -206,26 +413,12 @@ def find_longest_streak_across_all_habits() -> Tuple[Optional[str], int]:
         Tuple of (habit_name, longest_streak_length)
         Returns (None, 0) if no habits exist
     """
-    habits = HabitService.get_all_habits()
-    if not habits:
-        return None, 0
-    
-    max_streak = 0
-    best_habit = None
-    
-    for habit in habits:
-        completions = HabitService.get_completions_for_habit(habit.id)
-        longest_streak = calculate_longest_streak(completions, habit.periodicity)
-        
-        if longest_streak > max_streak:
-            max_streak = longest_streak
-            best_habit = habit.name
-    
-    return best_habit, max_streak
+    best_habit, max_streak = find_longest_streak_habit()
+    return (best_habit.name if best_habit else None), max_streak
 
 
 def get_completion_calendar(habit_name: str, start_date: date = None, 
-                          end_date: date = None) -> Dict[str, bool]:
+                          end_date: date = None, session: Session = None) -> Dict[str, bool]:
     """
     Get a calendar view of completions for a habit within a date range.
     
@@ -233,6 +426,7 @@ def get_completion_calendar(habit_name: str, start_date: date = None,
         habit_name: Name of the habit
         start_date: Start date for the calendar. Defaults to 30 days ago.
         end_date: End date for the calendar. Defaults to today.
+        session: Optional existing database session
         
     Returns:
         Dictionary mapping date strings (YYYY-MM-DD) to completion status
@@ -240,87 +434,85 @@ def get_completion_calendar(habit_name: str, start_date: date = None,
     Raises:
         HabitNotFoundError: If the habit doesn't exist
     """
-    habit = HabitService.get_habit_by_name(habit_name)
-    if not habit:
-        from ..core.exceptions import HabitNotFoundError
-        raise HabitNotFoundError(f"Habit '{habit_name}' not found")
+    with get_session_scope(session) as session:
+        habit = HabitService.get_habit_by_name(habit_name, session=session)
+        if not habit:
+            from ..core.exceptions import HabitNotFoundError
+            raise HabitNotFoundError(f"Habit '{habit_name}' not found")
+        
+        completion_ordinals = {
+            row.completed_at.toordinal()
+            for row in completion_repository.find_dates_by_habit_id(habit.id, session=session)
+        }
     
     if end_date is None:
         end_date = date.today()
     if start_date is None:
         start_date = end_date - timedelta(days=30)
     
-    completions = HabitService.get_completions_for_habit(habit.id)
-    completion_dates = {comp.completed_at.date() for comp in completions}
+    start_ordinal = start_date.toordinal()
+    end_ordinal = end_date.toordinal()
     
     calendar = {}
-    current_date = start_date
+    if start_ordinal > end_ordinal:
+        return calendar
     
-    while current_date <= end_date:
-        if habit.periodicity == Periodicity.DAILY:
-            calendar[current_date.isoformat()] = current_date in completion_dates
-            current_date += timedelta(days=1)
-        else:  # WEEKLY
-            # For weekly habits, show the week as completed if any day in that week has a completion
-            week_start = current_date - timedelta(days=current_date.weekday())
-            week_end = week_start + timedelta(days=6)
-            
-            week_completed = any(
-                week_start <= comp_date <= week_end 
-                for comp_date in completion_dates
-            )
-            
-            calendar[week_start.isoformat()] = week_completed
-            current_date = week_end + timedelta(days=1)
+    if habit.periodicity == Periodicity.DAILY:
+        for ordinal in range(start_ordinal, end_ordinal + 1):
+            calendar[date.fromordinal(ordinal).isoformat()] = ordinal in completion_ordinals
+    else:  # WEEKLY
+        # For weekly habits, show the week as completed if any day in that week
+        # has a completion. Weeks are keyed by their Monday; ordinal 1 is a
+        # Monday, so (ordinal - 1) % 7 is the weekday.
+        completed_weeks = {ordinal - (ordinal - 1) % 7 for ordinal in completion_ordinals}
+        first_monday = start_ordinal - (start_ordinal - 1) % 7
+        for week_start in range(first_monday, end_ordinal + 1, 7):
+            calendar[date.fromordinal(week_start).isoformat()] = week_start in completed_weeks
     
     return calendar
 
 
-def get_recent_activity_summary(days: int = 7) -> Dict[str, any]:
+def get_recent_activity_summary(days: int = 7, session: Session = None,
+                                now: datetime = None) -> Dict[str, any]:
     """
     Get a summary of recent habit activity.
     
     Args:
         days: Number of days to look back
+        session: Optional existing database session
+        now: Optional current time, so one report uses a single clock
+             reading. Defaults to datetime.now().
         
     Returns:
         Dictionary containing recent activity statistics
     """
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
-    
-    all_completions = HabitService.get_all_completions()
-    recent_completions = [
-        comp for comp in all_completions 
-        if comp.completed_at >= start_date
-    ]
+    if now is None:
+        now = datetime.now()
+    start_date = now - timedelta(days=days)
     
-    # Group by habit
-    completions_by_habit = defaultdict(list)
-    for comp in recent_completions:
-        completions_by_habit[comp.habit_id].append(comp)
-    
-    habits = HabitService.get_all_habits()
-    
-    summary = {
-        'period_days': days,
-        'total_completions': len(recent_completions),
-        'habits_with_activity': len(completions_by_habit),
-        'total_habits': len(habits),
-        'habit_activity': []
-    }
+    with get_session_scope(session) as session:
+        habits = HabitService.get_all_habits(session=session)
+        completions_by_habit = completion_repository.find_times_by_habit_ids(session=session)
     
+    # The grouped rows feed both the recent count and the streak; they are
+    # oldest first, so counting from the end stops at the first older row
+    habit_activity = []
     for habit in habits:
-        habit_recent_completions = completions_by_habit.get(habit.id, [])
-        activity = {
+        completions = completions_by_habit.get(habit.id, [])
+        recent = sum(1 for _ in takewhile(
+            lambda row: row.completed_at >= start_date, reversed(completions)
+        ))
+        habit_activity.append({
             'habit_name': habit.name,
             'periodicity': habit.periodicity.value,
-            'completions_in_period': len(habit_recent_completions),
-            'current_streak': calculate_streak(
-                HabitService.get_completions_for_habit(habit.id), 
-                habit.periodicity
-            )
-        }
-        summary['habit_activity'].append(activity)
+            'completions_in_period': recent,
+            'current_streak': calculate_streak(completions, habit.periodicity, now)
+        })
     
-    return summary
+    return {
+        'period_days': days,
+        'total_completions': sum(activity['completions_in_period'] for activity in habit_activity),
+        'habits_with_activity': sum(1 for activity in habit_activity if activity['completions_in_period']),
+        'total_habits': len(habits),
+        'habit_activity': habit_activity
+    }
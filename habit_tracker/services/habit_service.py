@@ -8,11 +8,12 @@ abstracting the database interactions and providing business logic.
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, desc, exists, insert, select
 
 from ..core.models import Habit, Completion, Periodicity
 from ..core.database import get_session_scope
+from ..core.models.repository import completion_repository
 from ..core.exceptions import (
     HabitNotFoundError,
     HabitAlreadyExistsError,
@@ -20,11 +21,17 @@ from ..core.exceptions import (
 )
 
 
+# Key under Session.info holding the per-session habit name -> Habit memo.
+# Holding the objects also keeps them alive in the (weak) identity map.
+_HABITS_BY_NAME = "habits_by_name"
+
+
 class HabitService:
     """Service class for habit-related operations."""
     
     @staticmethod
-    def create_habit(name: str, description: str = None, periodicity: Periodicity = Periodicity.DAILY) -> Habit:
+    def create_habit(name: str, description: str = None, periodicity: Periodicity = Periodicity.DAILY,
+                     session: Session = None) -> Habit:
         """
         Create a new habit in the database.
         
@@ -32,6 +39,7 @@ class HabitService:
             name: The name of the habit (must be unique)
             description: Optional description of the habit
             periodicity: How often the habit should be performed
+            session: Optional existing database session
             
         Returns:
             The created Habit object
@@ -39,10 +47,9 @@ class HabitService:
         Raises:
             HabitAlreadyExistsError: If a habit with the same name already exists
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             # Check if habit already exists
-            existing_habit = session.query(Habit).filter(Habit.name == name).first()
-            if existing_habit:
+            if session.scalar(select(exists().where(Habit.name == name))):
                 raise HabitAlreadyExistsError(f"Habit '{name}' already exists")
             
             habit = Habit(
@@ -52,70 +59,105 @@ class HabitService:
             )
             session.add(habit)
             session.flush()  # Get the ID before commit
+            session.info.setdefault(_HABITS_BY_NAME, {})[name] = habit
             return habit
 
     @staticmethod
-    def get_all_habits() -> List[Habit]:
+    def get_all_habits(with_completions: bool = False, session: Session = None) -> List[Habit]:
         """
         Retrieve all habits from the database.
         
+        The loaded habits also prime the session's name memo, so later
+        lookups by name or ID in the same session do not query again.
+        
+        Args:
+            with_completions: Eager-load each habit's completions with one
+                              extra ``WHERE habit_id IN (...)`` query
+            session: Optional existing database session
+            
         Returns:
             A list of all Habit objects, ordered by creation date
         """
-        with get_session_scope() as session:
-            return session.query(Habit).order_by(Habit.created_at).all()
+        with get_session_scope(session) as session:
+            query = session.query(Habit)
+            if with_completions:
+                query = query.options(selectinload(Habit.completions))
+            habits = query.order_by(Habit.created_at).all()
+            session.info.setdefault(_HABITS_BY_NAME, {}).update(
+                (habit.name, habit) for habit in habits
+            )
+            return habits
 
     @staticmethod
-    def get_habits_by_periodicity(periodicity: Periodicity) -> List[Habit]:
+    def get_habits_by_periodicity(periodicity: Periodicity, session: Session = None) -> List[Habit]:
         """
         Retrieve all habits with a specific periodicity.
         
         Args:
             periodicity: The periodicity to filter by
+            session: Optional existing database session
             
         Returns:
             A list of Habit objects with the specified periodicity
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Habit).filter(
                 Habit.periodicity == periodicity
             ).order_by(Habit.created_at).all()
 
     @staticmethod
-    def get_habit_by_name(name: str) -> Optional[Habit]:
+    def get_habit_by_name(name: str, session: Session = None) -> Optional[Habit]:
         """
         Retrieve a habit by its name.
         
+        Name lookups are memoized per session, so repeated lookups of the same
+        habit within one session (e.g. one CLI command) do not issue another
+        query.
+        
         Args:
             name: The name of the habit to find
+            session: Optional existing database session
             
         Returns:
             The Habit object if found, None otherwise
         """
-        with get_session_scope() as session:
-            return session.query(Habit).filter(Habit.name == name).first()
+        with get_session_scope(session) as session:
+            habits = session.info.setdefault(_HABITS_BY_NAME, {})
+            habit = habits.get(name)
+            if habit is not None and habit in session:
+                return habit
+            
+            habit = session.query(Habit).filter(Habit.name == name).first()
+            if habit:
+                habits[name] = habit
+            return habit
 
     @staticmethod
-    def get_habit_by_id(habit_id: int) -> Optional[Habit]:
+    def get_habit_by_id(habit_id: int, session: Session = None) -> Optional[Habit]:
         """
         Retrieve a habit by its ID.
         
+        Habits memoized by name in this session stay in the identity map, so
+        ``Session.get`` returns them without a query.
+        
         Args:
             habit_id: The ID of the habit to find
+            session: Optional existing database session
             
         Returns:
             The Habit object if found, None otherwise
         """
-        with get_session_scope() as session:
-            return session.query(Habit).filter(Habit.id == habit_id).first()
+        with get_session_scope(session) as session:
+            return session.get(Habit, habit_id)
 
     @staticmethod
-    def delete_habit(name: str) -> bool:
+    def delete_habit(name: str, session: Session = None) -> bool:
         """
         Delete a habit and all its completions.
         
         Args:
             name: The name of the habit to delete
+            session: Optional existing database session
             
         Returns:
             True if the habit was deleted, False if not found
@@ -123,25 +165,27 @@ class HabitService:
         Raises:
             HabitNotFoundError: If the habit doesn't exist
         """
-        with get_session_scope() as session:
-            habit = session.query(Habit).filter(Habit.name == name).first()
+        with get_session_scope(session) as session:
+            habit = HabitService.get_habit_by_name(name, session=session)
             if not habit:
                 raise HabitNotFoundError(f"Habit '{name}' not found")
             
             session.delete(habit)
+            session.info.get(_HABITS_BY_NAME, {}).pop(name, None)
             return True
 
     @staticmethod
-    def log_completion(name: str, completion_date: datetime = None) -> Completion:
+    def log_completion(name: str, completion_date: datetime = None, session: Session = None) -> Completion:
         """
         Log a completion for a habit.
         
         Args:
             name: The name of the habit to mark as complete
             completion_date: Optional specific date/time of completion. Defaults to now.
+            session: Optional existing database session
             
         Returns:
-            The created Completion object
+            The created Completion object, with ``habit`` already populated
             
         Raises:
             HabitNotFoundError: If the habit doesn't exist
@@ -150,20 +194,20 @@ class HabitService:
         if completion_date is None:
             completion_date = datetime.now()
         
-        with get_session_scope() as session:
-            habit = session.query(Habit).filter(Habit.name == name).first()
+        with get_session_scope(session) as session:
+            habit = HabitService.get_habit_by_name(name, session=session)
             if not habit:
                 raise HabitNotFoundError(f"Habit '{name}' not found")
             
             # Check if already completed for this period
-            if HabitService._is_habit_completed_for_period(habit.id, completion_date, session):
+            if HabitService._is_habit_completed_for_period(habit, completion_date, session):
                 period_name = "day" if habit.periodicity == Periodicity.DAILY else "week"
                 raise HabitAlreadyCompletedError(
                     f"Habit '{name}' is already completed for this {period_name}"
                 )
             
             completion = Completion(
-                habit_id=habit.id,
+                habit=habit,
                 completed_at=completion_date
             )
             session.add(completion)
@@ -171,62 +215,107 @@ class HabitService:
             return completion
 
     @staticmethod
-    def _is_habit_completed_for_period(habit_id: int, check_date: datetime, session: Session = None) -> bool:
+    def bulk_log_completions(rows: List[dict], session: Session = None) -> int:
+        """
+        Log many completions in one transaction with a single bulk insert.
+        
+        Applies the same one-completion-per-period rule as ``log_completion``,
+        but checks it in memory against one query of the habits' existing
+        completions instead of one existence query per row. Rows whose
+        period is already completed (in the database or earlier in ``rows``)
+        are skipped rather than raising.
+        
+        Args:
+            rows: Dictionaries with ``habit_id`` and ``completed_at`` keys
+            session: Optional existing database session
+            
+        Returns:
+            The number of completions inserted
+            
+        Raises:
+            HabitNotFoundError: If a row refers to a habit that doesn't exist
+        """
+        habit_ids = {row['habit_id'] for row in rows}
+        if not habit_ids:
+            return 0
+        
+        with get_session_scope(session) as session:
+            daily_by_id = {
+                habit_id: periodicity is Periodicity.DAILY
+                for habit_id, periodicity in session.execute(
+                    select(Habit.id, Habit.periodicity).where(Habit.id.in_(habit_ids))
+                )
+            }
+            missing = habit_ids - daily_by_id.keys()
+            if missing:
+                raise HabitNotFoundError(f"Habit with ID {min(missing)} not found")
+            
+            def period_key(habit_id: int, completed_at: datetime) -> tuple:
+                # Ordinal 1 is a Monday, so (ordinal - 1) // 7 numbers Monday-based weeks
+                ordinal = completed_at.toordinal()
+                return habit_id, ordinal if daily_by_id[habit_id] else (ordinal - 1) // 7
+            
+            completed = {
+                period_key(habit_id, completed_at)
+                for habit_id, completed_at in session.execute(
+                    select(Completion.habit_id, Completion.completed_at)
+                    .where(Completion.habit_id.in_(habit_ids))
+                )
+            }
+            
+            new_rows = []
+            for row in rows:
+                key = period_key(row['habit_id'], row['completed_at'])
+                if key not in completed:
+                    completed.add(key)
+                    new_rows.append(row)
+            
+            if new_rows:
+                session.execute(insert(Completion), new_rows)
+            return len(new_rows)
+
+    @staticmethod
+    def _is_habit_completed_for_period(habit: Habit, check_date: datetime, session: Session = None) -> bool:
         """
         Check if a habit is already completed for a given period.
         
+        Takes the already-loaded habit, so only the existence query runs.
+        
         Args:
-            habit_id: The ID of the habit to check
+            habit: The habit to check
             check_date: The date to check completion for
             session: Optional existing database session
             
         Returns:
             True if the habit is completed for the period, False otherwise
         """
-        def _check_completion(session: Session) -> bool:
-            habit = session.query(Habit).filter(Habit.id == habit_id).first()
-            if not habit:
-                return False
-            
-            if habit.periodicity == Periodicity.DAILY:
-                # Check for completion on the same day
-                start_of_day = check_date.replace(hour=0, minute=0, second=0, microsecond=0)
-                end_of_day = start_of_day + timedelta(days=1)
-            else:  # WEEKLY
-                # Check for completion in the same week (Monday to Sunday)
-                days_since_monday = check_date.weekday()
-                start_of_week = check_date.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days_since_monday)
-                end_of_week = start_of_week + timedelta(days=7)
-            
-            completion = session.query(Completion).filter(
-                and_(
-                    Completion.habit_id == habit_id,
-                    Completion.completed_at >= (start_of_day if habit.periodicity == Periodicity.DAILY else start_of_week),
-                    Completion.completed_at < (end_of_day if habit.periodicity == Periodicity.DAILY else end_of_week)
-                )
-            ).first()
-            
-            return completion is not None
+        period_start = check_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        if habit.periodicity == Periodicity.DAILY:
+            # Check for completion on the same day
+            period_end = period_start + timedelta(days=1)
+        else:  # WEEKLY
+            # Check for completion in the same week (Monday to Sunday)
+            period_start -= timedelta(days=check_date.weekday())
+            period_end = period_start + timedelta(days=7)
         
-        if session:
-            return _check_completion(session)
-        else:
-            with get_session_scope() as session:
-                return _check_completion(session)
+        return completion_repository.exists_in_period(
+            habit.id, period_start, period_end, session=session
+        )
 
     @staticmethod
-    def get_completions_for_habit(habit_id: int, limit: int = None) -> List[Completion]:
+    def get_completions_for_habit(habit_id: int, limit: int = None, session: Session = None) -> List[Completion]:
         """
         Get all completions for a specific habit.
         
         Args:
             habit_id: The ID of the habit
             limit: Optional limit on number of completions to return
+            session: Optional existing database session
             
         Returns:
             A list of Completion objects, ordered by completion date (newest first)
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             query = session.query(Completion).filter(
                 Completion.habit_id == habit_id
             ).order_by(desc(Completion.completed_at))
@@ -237,14 +326,17 @@ class HabitService:
             return query.all()
 
     @staticmethod
-    def get_all_completions() -> List[Completion]:
+    def get_all_completions(session: Session = None) -> List[Completion]:
         """
         Get all completions from the database.
         
+        Args:
+            session: Optional existing database session
+            
         Returns:
             A list of all Completion objects, ordered by completion date (newest first)
         """
-        with get_session_scope() as session:
+        with get_session_scope(session) as session:
             return session.query(Completion).order_by(desc(Completion.completed_at)).all()
 
 
@@ -5,6 +5,7 @@ from .date_helpers import *
 __all__ = [
     "get_week_start",
     "get_week_end", 
+    "get_week_end_date",
     "is_same_week",
     "days_between"
 ]
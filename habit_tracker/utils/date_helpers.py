@@ -1,9 +1,18 @@
 """Date utility functions for the Habit Tracker application."""
 
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, time
 from typing import Tuple
 
 
+# Time of day get_week_end reports for the last moment of a week
+_END_OF_DAY = time(23, 59, 59)
+
+
+def _monday_ordinal(target_date: date) -> int:
+    """Get the proleptic ordinal of the Monday starting the date's week."""
+    return target_date.toordinal() - target_date.weekday()
+
+
 def get_week_start(target_date: datetime) -> datetime:
     """
     Get the start of the week (Monday) for a given date.
@@ -14,9 +23,14 @@ def get_week_start(target_date: datetime) -> datetime:
     Returns:
         The datetime representing the start of the week (Monday at 00:00:00)
     """
-    days_since_monday = target_date.weekday()
-    week_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    return week_start - timedelta(days=days_since_monday)
+    # fromordinal gives the Monday at midnight in one step, without a
+    # replace() and a timedelta subtraction
+    week_start = datetime.fromordinal(_monday_ordinal(target_date))
+    
+    tzinfo = target_date.tzinfo
+    if tzinfo is not None:
+        week_start = week_start.replace(tzinfo=tzinfo)
+    return week_start
 
 
 def get_week_end(target_date: datetime) -> datetime:
@@ -29,8 +43,24 @@ def get_week_end(target_date: datetime) -> datetime:
     Returns:
         The datetime representing the end of the week (Sunday at 23:59:59)
     """
-    week_start = get_week_start(target_date)
-    return week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    return datetime.combine(get_week_end_date(target_date), _END_OF_DAY, target_date.tzinfo)
+
+
+def get_week_end_date(target_date: date) -> date:
+    """
+    Get the calendar date of the Sunday ending a date's week.
+    
+    A lighter variant of ``get_week_end`` for callers that only compare
+    days: it builds a single ``date`` from the Monday's ordinal, with no
+    time part or timedelta arithmetic.
+    
+    Args:
+        target_date: The date (or datetime) to find the week end for
+        
+    Returns:
+        The Sunday of the week as a date
+    """
+    return date.fromordinal(_monday_ordinal(target_date) + 6)
 
 
 def is_same_week(date1: datetime, date2: datetime) -> bool:
@@ -44,7 +74,8 @@ def is_same_week(date1: datetime, date2: datetime) -> bool:
     Returns:
         True if both dates are in the same week (Monday to Sunday)
     """
-    return get_week_start(date1).date() == get_week_start(date2).date()
+    # Inlined _monday_ordinal: two integer subtractions, no helper calls
+    return date1.toordinal() - date1.weekday() == date2.toordinal() - date2.weekday()
 
 
 def days_between(start_date: datetime, end_date: datetime) -> int:
@@ -72,15 +103,15 @@ def get_date_range(start_date: datetime, end_date: datetime) -> list[datetime]:
     Returns:
         A list of datetime objects for each day in the range
     """
-    dates = []
-    current_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    # datetime.fromordinal gives each day at midnight directly, so the list is
+    # built in one map over the day ordinals instead of a timedelta per step
+    dates = map(datetime.fromordinal, range(start_date.toordinal(), end_date.toordinal() + 1))
     
-    while current_date <= end_date:
-        dates.append(current_date)
-        current_date += timedelta(days=1)
+    tzinfo = start_date.tzinfo
+    if tzinfo is not None:
+        dates = (day.replace(tzinfo=tzinfo) for day in dates)
     
-    return dates
+    return list(dates)
 
 
 def format_date_for_display(target_date: datetime) -> str:
@@ -93,7 +124,9 @@ def format_date_for_display(target_date: datetime) -> str:
     Returns:
         A formatted date string
     """
-    return target_date.strftime("%Y-%m-%d")
+    # date.isoformat applied to a datetime formats only its date part, the
+    # same YYYY-MM-DD output as strftime without parsing a format string
+    return date.isoformat(target_date)
 
 
 def format_datetime_for_display(target_datetime: datetime) -> str:
@@ -106,7 +139,9 @@ def format_datetime_for_display(target_datetime: datetime) -> str:
     Returns:
         A formatted datetime string
     """
-    return target_datetime.strftime("%Y-%m-%d %H:%M")
+    # "YYYY-MM-DD HH:MM" is the leading part of the minute-precision ISO
+    # form; slicing drops the UTC offset of aware datetimes, as strftime did
+    return target_datetime.isoformat(" ", "minutes")[:16]
 
 
 
@@ -0,0 +1,44 @@
+"""Store habit periodicity as a small integer
+
+Revision ID: 5e0b7a3f2c14
+Revises: c624b5109847
+Create Date: 2026-10-15 11:03:27.184530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7a3f2c14'
+down_revision: Union[str, Sequence[str], None] = 'c624b5109847'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE habits SET periodicity = CASE periodicity "
+        "WHEN 'DAILY' THEN 0 WHEN 'WEEKLY' THEN 1 END"
+    )
+    with op.batch_alter_table('habits') as batch_op:
+        batch_op.alter_column('periodicity',
+                              existing_type=sa.Enum('DAILY', 'WEEKLY', name='periodicity'),
+                              type_=sa.SmallInteger(),
+                              existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('habits') as batch_op:
+        batch_op.alter_column('periodicity',
+                              existing_type=sa.SmallInteger(),
+                              type_=sa.Enum('DAILY', 'WEEKLY', name='periodicity'),
+                              existing_nullable=False)
+    op.execute(
+        "UPDATE habits SET periodicity = CASE periodicity "
+        "WHEN '0' THEN 'DAILY' WHEN '1' THEN 'WEEKLY' END"
+    )
@@ -0,0 +1,33 @@
+"""Add composite completion habit/date index
+
+Revision ID: c624b5109847
+Revises: d91db2172228
+Create Date: 2026-10-15 09:12:41.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c624b5109847'
+down_revision: Union[str, Sequence[str], None] = 'd91db2172228'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_completion_habit_date', 'completions', ['habit_id', 'completed_at'], unique=False)
+    # The composite index's leading habit_id column covers the single-column
+    # one. Only databases created from the models have it; the initial
+    # migration never did.
+    op.drop_index('ix_completions_habit_id', table_name='completions', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_completions_habit_id', 'completions', ['habit_id'], unique=False)
+    op.drop_index('idx_completion_habit_date', table_name='completions')
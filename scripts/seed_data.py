@@ -16,8 +16,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from habit_tracker.core.models import Habit, Completion, Periodicity
+from habit_tracker.core.models.repository import completion_repository
 from habit_tracker.services.habit_service import HabitService
-from habit_tracker.core.database import db_manager
+from habit_tracker.core.database import db_manager, get_session_scope
 from habit_tracker.fixtures.predefined_habits import (
     PREDEFINED_HABITS, 
     generate_four_weeks_sample_events,
@@ -67,16 +68,22 @@ def generate_realistic_completion_data(habits, days_back=None):
     # Get the predefined 4 weeks of sample events
     completion_events = generate_four_weeks_sample_events()
     
-    # Create completions for each habit
-    for habit_name, completions_list in completion_events.items():
-        print(f"  Creating {len(completions_list)} completions for '{habit_name}'...")
+    # One session, one name -> id lookup and one bulk insert for every event,
+    # instead of a lookup, duplicate check and commit per completion
+    with get_session_scope() as session:
+        habit_ids = {habit.name: habit.id for habit in HabitService.get_all_habits(session=session)}
         
-        for completion_date in completions_list:
-            try:
-                HabitService.log_completion(habit_name, completion_date)
-            except Exception as e:
-                # Skip if already exists or other error
-                pass
+        rows = []
+        for habit_name, completions_list in completion_events.items():
+            print(f"  Creating {len(completions_list)} completions for '{habit_name}'...")
+            habit_id = habit_ids[habit_name]
+            rows.extend(
+                {'habit_id': habit_id, 'completed_at': completion_date}
+                for completion_date in completions_list
+            )
+        
+        # Completions already recorded for their period are skipped
+        HabitService.bulk_log_completions(rows, session=session)
     
     print(f"✅ Generated completion data for {len(completion_events)} habits")
 
@@ -89,9 +96,10 @@ def print_seed_summary():
     
     habits = HabitService.get_all_habits()
     expected_stats = get_expected_statistics()
+    completions_by_habit = completion_repository.find_by_habit_ids(habit.id for habit in habits)
     
     for habit in habits:
-        completions = HabitService.get_completions_for_habit(habit.id)
+        completions = completions_by_habit[habit.id]
         print(f"\n📝 {habit.name} ({habit.periodicity.value})")
         print(f"   Total completions: {len(completions)}")
         
@@ -102,15 +110,16 @@ def print_seed_summary():
             print(f"   Expected completion rate: {expected['completion_rate']:.1f}%")
         
         if completions:
-            first_completion = min(comp.completed_at for comp in completions)
-            last_completion = max(comp.completed_at for comp in completions)
+            # find_by_habit_ids returns each habit's completions newest first,
+            # so the bounds are the ends of the list
+            first_completion = completions[-1].completed_at
+            last_completion = completions[0].completed_at
             print(f"   First completion: {first_completion.strftime('%Y-%m-%d')}")
             print(f"   Last completion: {last_completion.strftime('%Y-%m-%d')}")
         
         # Get current streak
-        from habit_tracker.services.analytics_service import calculate_streak, calculate_longest_streak
-        current_streak = calculate_streak(completions, habit.periodicity)
-        longest_streak = calculate_longest_streak(completions, habit.periodicity)
+        from habit_tracker.services.analytics_service import calculate_streaks
+        current_streak, longest_streak = calculate_streaks(completions, habit.periodicity)
         
         streak_unit = "days" if habit.periodicity == Periodicity.DAILY else "weeks"
         print(f"   Current streak: {current_streak} {streak_unit}")
@@ -5,38 +5,106 @@ This module contains pytest fixtures that are shared across all test modules.
 """
 
 import pytest
-import tempfile
-import os
 from datetime import datetime, timedelta
 
-from habit_tracker.core.models import Habit, Completion, Periodicity
-from habit_tracker.core.database import DatabaseManager
-from habit_tracker.services.habit_service import HabitService
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from habit_tracker.core.models import Base, Habit, Completion, Periodicity
+from habit_tracker.core.database import DatabaseManager, get_session_scope
 
-@pytest.fixture(scope="function")
-def test_db():
+
+@pytest.fixture(scope="session")
+def _test_engine():
     """
-    Create a temporary test database for each test.
+    Create the in-memory test database and its schema once per test run.
     
-    This fixture creates a clean database for each test to ensure isolation.
+    StaticPool hands every checkout the same connection, which is what keeps
+    an in-memory database alive and shared; each pytest-xdist worker gets
+    its own. Nothing touches the disk, so durability pragmas are switched
+    off. The pysqlite driver starts transactions lazily and does not
+    understand SAVEPOINT, so the engine emits BEGIN itself, as SQLAlchemy's
+    SQLite documentation recommends; ``test_db`` relies on that for its
+    savepoints.
     """
-    # Create a temporary file for testing
-    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-    temp_db.close()
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    
+    @event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _emit_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+    
+    Base.metadata.create_all(engine)
+    
+    yield engine
     
-    # Initialize test database
-    test_db_url = f"sqlite:///{temp_db.name}"
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def test_db(_test_engine, monkeypatch):
+    """
+    Provide a clean test database for each test.
+    
+    Every test runs inside one outer transaction that is rolled back at
+    teardown. Sessions opened by the code under test join it through a
+    SAVEPOINT, so their commits and rollbacks stay inside the test and the
+    schema is only created once per run.
+    """
     db_manager = DatabaseManager()
-    db_manager.init_db(test_db_url)
+    connection = _test_engine.connect()
+    transaction = connection.begin()
+    
+    # CLI commands call init_db() for the default data/habits.db; keep them
+    # on this worker's test database instead, which also stops parallel
+    # workers from sharing (and racing on) the real database file
+    monkeypatch.setattr(db_manager, "init_db", lambda database_url=None: None)
+    monkeypatch.setattr(db_manager, "_engine", _test_engine)
+    # Restored at teardown, so nothing keeps a factory bound to the closed
+    # connection once the test is over
+    monkeypatch.setattr(db_manager, "_session_factory", sessionmaker(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    ))
     
     yield db_manager
     
-    # Cleanup
-    try:
-        os.unlink(temp_db.name)
-    except OSError:
-        pass  # File might already be deleted
+    transaction.rollback()
+    connection.close()
+
+
+def _seed_habit(session, **kwargs) -> Habit:
+    """
+    Insert a habit directly, for fixtures that seed known-unique names.
+    
+    Skips the existence query ``HabitService.create_habit`` runs before its
+    INSERT; tests of the duplicate-name check should keep using the service.
+    
+    Args:
+        session: The session to add the habit to
+        **kwargs: Column values for the new Habit
+        
+    Returns:
+        The flushed Habit, with its ID assigned
+    """
+    habit = Habit(**kwargs)
+    session.add(habit)
+    session.flush()
+    return habit
 
 
 @pytest.fixture
@@ -47,25 +115,23 @@ def sample_habits(test_db):
     Returns:
         List of created Habit objects
     """
-    habits = []
-    
-    # Create daily habit
-    daily_habit = HabitService.create_habit(
-        name="Test Daily Habit",
-        description="A test daily habit",
-        periodicity=Periodicity.DAILY
-    )
-    habits.append(daily_habit)
-    
-    # Create weekly habit
-    weekly_habit = HabitService.create_habit(
-        name="Test Weekly Habit",
-        description="A test weekly habit",
-        periodicity=Periodicity.WEEKLY
-    )
-    habits.append(weekly_habit)
+    # Both habits are seeded in one session, committed together
+    with get_session_scope() as session:
+        daily_habit = _seed_habit(
+            session,
+            name="Test Daily Habit",
+            description="A test daily habit",
+            periodicity=Periodicity.DAILY
+        )
+        
+        weekly_habit = _seed_habit(
+            session,
+            name="Test Weekly Habit",
+            description="A test weekly habit",
+            periodicity=Periodicity.WEEKLY
+        )
     
-    return habits
+    return [daily_habit, weekly_habit]
 
 
 @pytest.fixture
@@ -74,31 +140,69 @@ def habit_with_completions(test_db):
     Create a habit with some completion data for testing analytics.
     
     Returns:
-        Tuple of (habit, completions_list)
+        Tuple of (habit, completions_list); the completions carry their
+        habit_id and completed_at but no id
     """
-    # Create a test habit
-    habit = HabitService.create_habit(
-        name="Test Habit with Data",
-        description="A habit with completion data",
-        periodicity=Periodicity.DAILY
-    )
-    
-    # Add some completions over the past week
-    completions = []
-    base_date = datetime.now()
+    # Read from the clock rather than the noon base_date fixture, since the
+    # statistics windows these completions feed are measured from now
+    now = datetime.now()
     
-    for i in range(7):
-        completion_date = base_date - timedelta(days=i)
-        completion = HabitService.log_completion(habit.name, completion_date)
-        completions.append(completion)
+    # Create the habit and a week of completions in one session; the days
+    # are distinct, so the per-completion duplicate check is skipped and the
+    # rows go in as one executemany INSERT
+    with get_session_scope() as session:
+        habit = _seed_habit(
+            session,
+            name="Test Habit with Data",
+            description="A habit with completion data",
+            periodicity=Periodicity.DAILY
+        )
+        dates = [now - timedelta(days=i) for i in range(7)]
+        Completion.bulk_create(session, habit.id, dates)
     
+    completions = [Completion(habit_id=habit.id, completed_at=completed_at) for completed_at in dates]
     return habit, completions
 
 
+@pytest.fixture(scope="class")
+def base_date():
+    """
+    Reference time for building completion histories, read once per class.
+    
+    Noon keeps day offsets from crossing midnight.
+    
+    Returns:
+        Today at 12:00
+    """
+    return datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+
+
 @pytest.fixture
+def bulk_complete(test_db, base_date):
+    """
+    Record completions for a habit with one INSERT, counting back from base_date.
+    
+    For tests that only need completion history: it skips the per-call
+    lookup and duplicate check of ``HabitService.log_completion``, so tests
+    of that business logic should keep calling the service.
+    
+    Returns:
+        Function taking a habit, the offsets to record and an optional
+        offset unit (one day by default)
+    """
+    def _bulk_complete(habit, offsets, unit=timedelta(days=1)):
+        with get_session_scope() as session:
+            return Completion.bulk_create(
+                session, habit.id, [base_date - unit * offset for offset in offsets]
+            )
+    
+    return _bulk_complete
+
+
+@pytest.fixture(scope="class")
 def cli_runner():
     """
-    Create a Click test runner for CLI testing.
+    Create a Click test runner for CLI testing, shared within a test class.
     
     Returns:
         CliRunner instance
@@ -107,6 +211,21 @@ def cli_runner():
     return CliRunner()
 
 
+@pytest.fixture(scope="class")
+def cli_app():
+    """
+    Import the CLI's top-level command group for the tests that invoke it.
+    
+    The import is deferred to here so test runs (or pytest-xdist workers)
+    that select no CLI tests do not load Click and the command modules.
+    
+    Returns:
+        The ``cli`` Click group
+    """
+    from habit_tracker.cli.commands import cli
+    return cli
+
+
 # Test data fixtures
 @pytest.fixture
 def sample_habit_data():
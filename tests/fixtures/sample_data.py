@@ -51,15 +51,18 @@ def generate_completion_dates(days_back: int = 30, success_rate: float = 0.7):
     """
     import random
     
-    completion_dates = []
     base_date = datetime.now()
+    draw = random.random
     
-    for i in range(days_back):
-        if random.random() < success_rate:
-            completion_date = base_date - timedelta(days=i)
-            completion_dates.append(completion_date)
-    
-    return sorted(completion_dates)
+    # Draw from today backwards, as before, so a seeded run selects the same
+    # days; the result is newest first and reversing it replaces the sort
+    completion_dates = [
+        base_date - timedelta(days=i)
+        for i in range(days_back)
+        if draw() < success_rate
+    ]
+    completion_dates.reverse()
+    return completion_dates
 
 
 def create_streak_pattern(consecutive_days: int = 5, start_date: datetime = None):
@@ -10,22 +10,22 @@ This module contains unit tests for all major components:
 """
 
 import pytest
-from datetime import datetime, timedelta, date
-import tempfile
-import os
-from click.testing import CliRunner
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
 
-from habit_tracker.core.models import Habit, Completion, Periodicity, Base
-from habit_tracker.core.database import DatabaseManager
+from habit_tracker.core.models import Habit, Completion, Periodicity
 from habit_tracker.services.habit_service import HabitService
 from habit_tracker.services import analytics_service as analytics
-from habit_tracker.cli.commands import cli
 from habit_tracker.core.exceptions import (
     HabitNotFoundError,
-    HabitAlreadyExistsError,
-    HabitAlreadyCompletedError
+    HabitAlreadyExistsError
 )
 
+DAILY = Periodicity.DAILY
+WEEKLY = Periodicity.WEEKLY
+
 
 # Use fixtures from conftest.py instead of defining them here
 
@@ -33,20 +33,20 @@ from habit_tracker.core.exceptions import (
 class TestModels:
     """Test the SQLAlchemy models."""
     
-    def test_habit_creation(self, test_db):
+    def test_habit_creation(self):
         """Test creating a Habit model."""
         habit = Habit(
             name="Test Habit",
             description="Test Description",
-            periodicity=Periodicity.DAILY
+            periodicity=DAILY
         )
         
         assert habit.name == "Test Habit"
         assert habit.description == "Test Description"
-        assert habit.periodicity == Periodicity.DAILY
+        assert habit.periodicity == DAILY
         assert habit.id is None  # Not saved yet
     
-    def test_completion_creation(self, test_db):
+    def test_completion_creation(self):
         """Test creating a Completion model."""
         completion = Completion(
             habit_id=1,
@@ -57,10 +57,10 @@ class TestModels:
         assert isinstance(completion.completed_at, datetime)
         assert completion.id is None  # Not saved yet
     
-    def test_periodicity_enum(self, test_db):
+    def test_periodicity_enum(self):
         """Test the Periodicity enum."""
-        assert Periodicity.DAILY.value == "daily"
-        assert Periodicity.WEEKLY.value == "weekly"
+        assert DAILY.value == "daily"
+        assert WEEKLY.value == "weekly"
 
 
 class TestCRUD:
@@ -71,46 +71,20 @@ class TestCRUD:
         habit = HabitService.create_habit(
             name="Test Habit",
             description="Test Description",
-            periodicity=Periodicity.DAILY
+            periodicity=DAILY
         )
         
         assert habit.id is not None
         assert habit.name == "Test Habit"
         assert habit.description == "Test Description"
-        assert habit.periodicity == Periodicity.DAILY
+        assert habit.periodicity == DAILY
     
     def test_create_duplicate_habit(self, test_db):
         """Test that creating a duplicate habit raises an error."""
-        HabitService.create_habit("Duplicate Habit", periodicity=Periodicity.DAILY)
+        HabitService.create_habit("Duplicate Habit", periodicity=DAILY)
         
         with pytest.raises(HabitAlreadyExistsError):
-            HabitService.create_habit("Duplicate Habit", periodicity=Periodicity.DAILY)
-    
-    def test_get_all_habits(self, sample_habits):
-        """Test retrieving all habits."""
-        habits = HabitService.get_all_habits()
-        assert len(habits) == 2
-        assert any(h.name == "Test Daily Habit" for h in habits)
-        assert any(h.name == "Test Weekly Habit" for h in habits)
-    
-    def test_get_habits_by_periodicity(self, sample_habits):
-        """Test filtering habits by periodicity."""
-        daily_habits = HabitService.get_habits_by_periodicity(Periodicity.DAILY)
-        weekly_habits = HabitService.get_habits_by_periodicity(Periodicity.WEEKLY)
-        
-        assert len(daily_habits) == 1
-        assert len(weekly_habits) == 1
-        assert daily_habits[0].name == "Test Daily Habit"
-        assert weekly_habits[0].name == "Test Weekly Habit"
-    
-    def test_get_habit_by_name(self, sample_habits):
-        """Test retrieving a habit by name."""
-        habit = HabitService.get_habit_by_name("Test Daily Habit")
-        assert habit is not None
-        assert habit.name == "Test Daily Habit"
-        
-        non_existent = HabitService.get_habit_by_name("Non-existent Habit")
-        assert non_existent is None
+            HabitService.create_habit("Duplicate Habit", periodicity=DAILY)
     
     def test_log_completion(self, sample_habits):
         """Test logging a habit completion."""
@@ -124,22 +98,6 @@ class TestCRUD:
         with pytest.raises(HabitNotFoundError):
             HabitService.log_completion("Non-existent Habit")
     
-    def test_duplicate_completion_same_day(self, sample_habits):
-        """Test that completing the same daily habit twice in one day raises an error."""
-        completion_date = datetime.now()
-        HabitService.log_completion("Test Daily Habit", completion_date)
-        
-        with pytest.raises(HabitAlreadyCompletedError):
-            HabitService.log_completion("Test Daily Habit", completion_date)
-    
-    def test_duplicate_completion_same_week(self, sample_habits):
-        """Test that completing the same weekly habit twice in one week raises an error."""
-        completion_date = datetime.now()
-        HabitService.log_completion("Test Weekly Habit", completion_date)
-        
-        with pytest.raises(HabitAlreadyCompletedError):
-            HabitService.log_completion("Test Weekly Habit", completion_date)
-    
     def test_delete_habit(self, sample_habits):
         """Test deleting a habit."""
         # Add a completion first
@@ -168,65 +126,33 @@ class TestAnalytics:
     
     def test_calculate_streak_daily_empty(self, test_db):
         """Test streak calculation with no completions."""
-        streak = analytics.calculate_streak([], Periodicity.DAILY)
+        streak = analytics.calculate_streak([], DAILY)
         assert streak == 0
     
-    def test_calculate_streak_daily_consecutive(self, sample_habits):
-        """Test daily streak calculation with consecutive completions."""
-        habit = sample_habits[0]  # Daily habit
-        base_date = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
-        
-        # Create consecutive completions for 3 days
-        for i in range(3):
-            completion_date = base_date - timedelta(days=i)
-            HabitService.log_completion(habit.name, completion_date)
+    @pytest.mark.parametrize("habit_index, offsets, unit, calculate, expected", [
+        pytest.param(0, range(3), timedelta(days=1), analytics.calculate_streak, 3,
+                     id="daily-consecutive"),
+        pytest.param(1, range(3), timedelta(weeks=1), analytics.calculate_streak, 3,
+                     id="weekly-consecutive"),
+        # A streak of 5 days, a gap of 2 days, then 3 days
+        pytest.param(0, [*range(5), *range(7, 10)], timedelta(days=1),
+                     analytics.calculate_longest_streak, 5, id="longest"),
+    ])
+    def test_streak_calculation(self, sample_habits, bulk_complete,
+                                habit_index, offsets, unit, calculate, expected):
+        """Test streak calculations over a history of completions."""
+        habit = sample_habits[habit_index]  # 0 is the daily habit, 1 the weekly one
+        bulk_complete(habit, offsets, unit=unit)
         
         completions = HabitService.get_completions_for_habit(habit.id)
-        streak = analytics.calculate_streak(completions, Periodicity.DAILY)
-        assert streak == 3
+        assert calculate(completions, habit.periodicity) == expected
     
-    def test_calculate_streak_weekly_consecutive(self, sample_habits):
-        """Test weekly streak calculation with consecutive completions."""
-        habit = sample_habits[1]  # Weekly habit
-        base_date = datetime.now()
-        
-        # Create consecutive weekly completions
-        for i in range(3):
-            completion_date = base_date - timedelta(weeks=i)
-            HabitService.log_completion(habit.name, completion_date)
-        
-        completions = HabitService.get_completions_for_habit(habit.id)
-        streak = analytics.calculate_streak(completions, Periodicity.WEEKLY)
-        assert streak == 3
-    
-    def test_calculate_longest_streak(self, sample_habits):
-        """Test longest streak calculation."""
-        habit = sample_habits[0]  # Daily habit
-        base_date = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
-        
-        # Create a streak of 5 days, then a break, then 3 days
-        for i in range(5):
-            completion_date = base_date - timedelta(days=i)
-            HabitService.log_completion(habit.name, completion_date)
-        
-        # Gap of 2 days
-        for i in range(3):
-            completion_date = base_date - timedelta(days=i+7)
-            HabitService.log_completion(habit.name, completion_date)
-        
-        completions = HabitService.get_completions_for_habit(habit.id)
-        longest_streak = analytics.calculate_longest_streak(completions, Periodicity.DAILY)
-        assert longest_streak == 5  # The longer of the two streaks
-    
-    def test_get_habit_statistics(self, sample_habits):
+    def test_get_habit_statistics(self, sample_habits, bulk_complete):
         """Test getting comprehensive habit statistics."""
         habit = sample_habits[0]  # Daily habit
         
         # Add some completions
-        base_date = datetime.now()
-        for i in range(3):
-            completion_date = base_date - timedelta(days=i)
-            HabitService.log_completion(habit.name, completion_date)
+        bulk_complete(habit, range(3))
         
         stats = analytics.get_habit_statistics(habit)
         
@@ -237,20 +163,15 @@ class TestAnalytics:
         assert stats['longest_streak'] >= 0
         assert 'completion_rate' in stats
     
-    def test_find_longest_streak_across_all_habits(self, sample_habits):
+    def test_find_longest_streak_across_all_habits(self, sample_habits, bulk_complete):
         """Test finding the habit with the longest streak."""
         # Add completions to daily habit
         daily_habit = sample_habits[0]
-        base_date = datetime.now()
-        for i in range(5):
-            completion_date = base_date - timedelta(days=i)
-            HabitService.log_completion(daily_habit.name, completion_date)
+        bulk_complete(daily_habit, range(5))
         
         # Add fewer completions to weekly habit
         weekly_habit = sample_habits[1]
-        for i in range(2):
-            completion_date = base_date - timedelta(weeks=i)
-            HabitService.log_completion(weekly_habit.name, completion_date)
+        bulk_complete(weekly_habit, range(2), unit=timedelta(weeks=1))
         
         best_habit, max_streak = analytics.find_longest_streak_across_all_habits()
         
@@ -277,94 +198,68 @@ class TestAnalytics:
 class TestCLI:
     """Test CLI commands."""
     
-    def test_create_habit_command(self, test_db):
-        """Test the create habit CLI command."""
-        import uuid
-        unique_name = f'CLI Test Habit {uuid.uuid4().hex[:8]}'
-        
-        runner = CliRunner()
-        result = runner.invoke(cli, [
-            'create',
-            '--name', unique_name,
-            '--description', 'Test habit from CLI',
-            '--periodicity', 'daily'
-        ])
-        
-        assert result.exit_code == 0
-        assert 'created successfully' in result.output
-    
-    def test_complete_nonexistent_habit_command(self, test_db):
-        """Test completing a non-existent habit shows appropriate error."""
-        import uuid
-        nonexistent_name = f'Nonexistent Habit {uuid.uuid4().hex[:8]}'
-        
-        runner = CliRunner()
-        result = runner.invoke(cli, ['complete', nonexistent_name])
-        
-        assert result.exit_code == 0
-        assert 'not found' in result.output.lower() or 'error' in result.output.lower()
-    
-    def test_delete_habit_cancel_command(self, test_db):
-        """Test canceling habit deletion."""
-        import uuid
-        habit_name = f'Test Delete Cancel {uuid.uuid4().hex[:8]}'
-        
-        runner = CliRunner()
+    @pytest.mark.parametrize("args, stdin, exit_code, expected", [
+        pytest.param(
+            ['create', '--name', 'CLI Test Habit', '--description', 'Test habit from CLI',
+             '--periodicity', 'daily'],
+            None, 0, "'CLI Test Habit' (daily) created successfully", id="create"),
+        pytest.param(['complete', 'Nonexistent Habit'], None, 0,
+                     "Habit 'Nonexistent Habit' not found", id="complete-nonexistent"),
         # User enters 'n' to cancel deletion
-        result = runner.invoke(cli, ['delete', habit_name], input='n\n')
-        
-        assert result.exit_code in [0, 1]  # Either aborted or completed
-        # Should show confirmation prompt
-        assert 'sure' in result.output.lower() or 'aborted' in result.output.lower()
+        pytest.param(['delete', 'Test Weekly Habit'], 'n\n', 1, 'Aborted!', id="delete-cancel"),
+        pytest.param(['analyze', 'list-all'], None, 0, 'Name: Test Weekly Habit', id="list-all"),
+        pytest.param(['analyze', 'list-by-periodicity', 'daily'], None, 0,
+                     'Name: Test Daily Habit', id="list-by-periodicity"),
+        pytest.param(['analyze', 'longest-streak', 'Nonexistent Habit'], None, 0,
+                     "Habit 'Nonexistent Habit' not found", id="longest-streak-nonexistent"),
+        pytest.param(['analyze', 'summary'], None, 0, 'Total completions: 1', id="summary"),
+    ])
+    def test_command(self, cli_runner, cli_app, sample_habits, args, stdin, exit_code, expected):
+        """Test that a CLI command runs against the test database and reports its result."""
+        HabitService.log_completion(sample_habits[0].name)
+        
+        result = cli_runner.invoke(cli_app, args, input=stdin)
+        
+        assert result.exit_code == exit_code
+        assert expected in result.output
     
-    def test_list_all_habits_command(self, test_db):
-        """Test the list all habits CLI command."""
-        # Create test habits
-        habit1 = HabitService.create_habit(name="CLI List Test 1", periodicity=Periodicity.DAILY)
-        habit2 = HabitService.create_habit(name="CLI List Test 2", periodicity=Periodicity.WEEKLY)
+    def test_complete_reports_current_streak(self, cli_runner, cli_app, sample_habits,
+                                             bulk_complete):
+        """Test completing a real habit, which extends its streak from the previous days."""
+        habit = sample_habits[0]  # Daily habit
+        bulk_complete(habit, [1, 2])
         
-        runner = CliRunner()
-        result = runner.invoke(cli, ['analyze', 'list-all'])
+        result = cli_runner.invoke(cli_app, ['complete', habit.name])
         
         assert result.exit_code == 0
-        # Just check that it contains habit information, not specific names from prod DB
-        assert 'Tracked Habits' in result.output or 'habits' in result.output.lower()
+        assert f"Habit '{habit.name}' marked as complete for today" in result.output
+        assert "Current streak: 3 days" in result.output
     
-    def test_list_by_periodicity_command(self, test_db):
-        """Test the list by periodicity CLI command."""
-        # Create test habits
-        daily_habit = HabitService.create_habit(name="CLI Daily List Test", periodicity=Periodicity.DAILY)
-        weekly_habit = HabitService.create_habit(name="CLI Weekly List Test", periodicity=Periodicity.WEEKLY)
-        
-        runner = CliRunner()
-        result = runner.invoke(cli, ['analyze', 'list-by-periodicity', 'daily'])
+    def test_failed_flush_reports_error_without_traceback(self, cli_runner, cli_app, test_db,
+                                                         monkeypatch):
+        """Test that a command whose flush fails still ends with its own error message."""
+        def _failing_create(name, description=None, periodicity=None, session=None):
+            session.add(Habit(name=None, periodicity=periodicity))
+            session.flush()
         
-        assert result.exit_code == 0
-        # Just verify command executed successfully
-        assert 'Habits' in result.output or 'daily' in result.output.lower()
-    
-    def test_longest_streak_nonexistent_habit_command(self, test_db):
-        """Test longest streak analysis for non-existent habit shows error."""
-        import uuid
-        nonexistent_name = f'Nonexistent Habit {uuid.uuid4().hex[:8]}'
+        monkeypatch.setattr(HabitService, "create_habit", staticmethod(_failing_create))
         
-        runner = CliRunner()
-        result = runner.invoke(cli, ['analyze', 'longest-streak', nonexistent_name])
+        result = cli_runner.invoke(cli_app, ['create', '--name', 'Broken', '--periodicity', 'daily'])
         
-        assert result.exit_code == 0
-        assert 'not found' in result.output.lower() or 'error' in result.output.lower()
+        assert result.exception is None
+        assert "Unexpected error" in result.output
     
-    def test_summary_command(self, test_db):
-        """Test the summary CLI command."""
-        # Create a habit and add completion
-        habit = HabitService.create_habit(name="CLI Summary Test", periodicity=Periodicity.DAILY)
-        HabitService.log_completion(habit.name)
-        
-        runner = CliRunner()
-        result = runner.invoke(cli, ['analyze', 'summary'])
+    def test_importing_commands_skips_sqlalchemy(self):
+        """Test that loading the CLI (as for --help) does not import SQLAlchemy."""
+        # A fresh interpreter, since this one has already imported it
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, habit_tracker.cli.commands; print('sqlalchemy' in sys.modules)"],
+            cwd=Path(__file__).resolve().parents[2],
+            capture_output=True, text=True, check=True,
+        )
         
-        assert result.exit_code == 0
-        assert 'Activity Summary' in result.output or 'summary' in result.output.lower()
+        assert result.stdout.strip() == "False"
 
 
 if __name__ == '__main__':
@@ -7,7 +7,8 @@ This module tests business logic in the services layer.
 import pytest
 from datetime import datetime, timedelta
 
-from habit_tracker.core.models import Periodicity
+from habit_tracker.core.models import Completion, Periodicity
+from habit_tracker.core.database import get_session_scope
 from habit_tracker.core.exceptions import (
     HabitNotFoundError,
     HabitAlreadyExistsError,
@@ -16,6 +17,9 @@ from habit_tracker.core.exceptions import (
 from habit_tracker.services.habit_service import HabitService
 from habit_tracker.services import analytics_service
 
+DAILY = Periodicity.DAILY
+WEEKLY = Periodicity.WEEKLY
+
 
 @pytest.mark.unit
 class TestHabitService:
@@ -26,23 +30,23 @@ class TestHabitService:
         habit = HabitService.create_habit(
             name="Test Habit",
             description="Test Description",
-            periodicity=Periodicity.DAILY
+            periodicity=DAILY
         )
         
         assert habit.name == "Test Habit"
         assert habit.description == "Test Description"
-        assert habit.periodicity == Periodicity.DAILY
+        assert habit.periodicity == DAILY
         assert habit.id is not None
         assert habit.created_at is not None
     
     def test_create_habit_duplicate_name(self, test_db):
         """Test that creating a habit with duplicate name fails."""
         # Create first habit
-        HabitService.create_habit("Duplicate Name", periodicity=Periodicity.DAILY)
+        HabitService.create_habit("Duplicate Name", periodicity=DAILY)
         
         # Try to create another with same name
         with pytest.raises(HabitAlreadyExistsError):
-            HabitService.create_habit("Duplicate Name", periodicity=Periodicity.DAILY)
+            HabitService.create_habit("Duplicate Name", periodicity=DAILY)
     
     def test_get_all_habits_empty(self, test_db):
         """Test getting all habits when none exist."""
@@ -58,8 +62,8 @@ class TestHabitService:
     
     def test_get_habits_by_periodicity(self, sample_habits):
         """Test filtering habits by periodicity."""
-        daily_habits = HabitService.get_habits_by_periodicity(Periodicity.DAILY)
-        weekly_habits = HabitService.get_habits_by_periodicity(Periodicity.WEEKLY)
+        daily_habits = HabitService.get_habits_by_periodicity(DAILY)
+        weekly_habits = HabitService.get_habits_by_periodicity(WEEKLY)
         
         assert len(daily_habits) == 1
         assert len(weekly_habits) == 1
@@ -97,33 +101,57 @@ class TestHabitService:
         
         assert completion.habit_id == sample_habits[0].id
         assert completion.completed_at is not None
+        assert completion.habit.name == "Test Daily Habit"
     
     def test_log_completion_habit_not_found(self, test_db):
         """Test logging completion for non-existent habit."""
         with pytest.raises(HabitNotFoundError):
             HabitService.log_completion("Non-existent Habit")
     
-    def test_log_completion_duplicate_daily(self, sample_habits):
-        """Test that completing the same daily habit twice in one day fails."""
+    @pytest.mark.parametrize("habit_name, period", [
+        pytest.param("Test Daily Habit", DAILY, id="daily"),
+        pytest.param("Test Weekly Habit", WEEKLY, id="weekly"),
+    ])
+    def test_log_completion_duplicate(self, sample_habits, habit_name, period):
+        """Test that completing a habit twice in one period fails."""
         completion_date = datetime.now()
         
         # First completion should succeed
-        HabitService.log_completion("Test Daily Habit", completion_date)
+        completion = HabitService.log_completion(habit_name, completion_date)
+        assert completion.habit.periodicity == period
         
-        # Second completion on same day should fail
+        # Second completion in the same period should fail
         with pytest.raises(HabitAlreadyCompletedError):
-            HabitService.log_completion("Test Daily Habit", completion_date)
+            HabitService.log_completion(habit_name, completion_date)
     
-    def test_log_completion_duplicate_weekly(self, sample_habits):
-        """Test that completing the same weekly habit twice in one week fails."""
-        completion_date = datetime.now()
+    def test_bulk_log_completions_skips_completed_periods(self, sample_habits):
+        """Test that bulk logging keeps one completion per period."""
+        daily, weekly = sample_habits
+        monday = datetime(2023, 11, 13, 9, 0)
+        HabitService.log_completion(daily.name, monday)
         
-        # First completion should succeed
-        HabitService.log_completion("Test Weekly Habit", completion_date)
+        rows = [
+            {'habit_id': daily.id, 'completed_at': monday + timedelta(hours=3)},  # already done
+            {'habit_id': daily.id, 'completed_at': monday + timedelta(days=1)},
+            {'habit_id': weekly.id, 'completed_at': monday},
+            {'habit_id': weekly.id, 'completed_at': monday + timedelta(days=6)},  # same week
+        ]
         
-        # Second completion in same week should fail
-        with pytest.raises(HabitAlreadyCompletedError):
-            HabitService.log_completion("Test Weekly Habit", completion_date)
+        assert HabitService.bulk_log_completions(rows) == 2
+        assert len(HabitService.get_completions_for_habit(daily.id)) == 2
+        assert len(HabitService.get_completions_for_habit(weekly.id)) == 1
+        with pytest.raises(HabitNotFoundError):
+            HabitService.bulk_log_completions([{'habit_id': -1, 'completed_at': monday}])
+    
+    def test_service_calls_share_caller_session(self, sample_habits):
+        """Test that service methods reuse a session passed by the caller."""
+        with get_session_scope() as session:
+            HabitService.log_completion("Test Daily Habit", session=session)
+            habit = HabitService.get_habit_by_name("Test Daily Habit", session=session)
+            completions = HabitService.get_completions_for_habit(habit.id, session=session)
+            
+            assert len(completions) == 1
+            assert completions[0].habit is habit
 
 
 @pytest.mark.unit
@@ -132,14 +160,84 @@ class TestAnalyticsService:
     
     def test_calculate_streak_empty(self, test_db):
         """Test streak calculation with no completions."""
-        streak = analytics_service.calculate_streak([], Periodicity.DAILY)
+        streak = analytics_service.calculate_streak([], DAILY)
         assert streak == 0
     
     def test_calculate_longest_streak_empty(self, test_db):
         """Test longest streak calculation with no completions."""
-        longest = analytics_service.calculate_longest_streak([], Periodicity.DAILY)
+        longest = analytics_service.calculate_longest_streak([], DAILY)
         assert longest == 0
     
+    def test_streaks_with_single_completion(self):
+        """Test that a lone completion only counts as current when recent."""
+        end_date = datetime(2023, 11, 15, 12, 0)
+        today = [Completion(habit_id=1, completed_at=datetime(2023, 11, 15, 8, 0))]
+        yesterday = [Completion(habit_id=1, completed_at=datetime(2023, 11, 14, 8, 0))]
+        
+        assert analytics_service.calculate_streak(today, DAILY, end_date) == 1
+        assert analytics_service.calculate_streak(yesterday, DAILY, end_date) == 0
+        assert analytics_service.calculate_streak(yesterday, WEEKLY, end_date) == 1
+        assert analytics_service.calculate_longest_streak(yesterday, DAILY) == 1
+    
+    def test_weekly_streaks_across_week_boundaries(self):
+        """Test weekly streaks count calendar weeks, not 7-day distances."""
+        end_date = datetime(2023, 11, 15, 12, 0)  # Wednesday
+        dates = [
+            datetime(2023, 11, 13, 9, 0),   # Monday, current week
+            datetime(2023, 11, 12, 9, 0),   # Sunday, previous week
+            datetime(2023, 10, 29, 9, 0),   # Sunday two weeks earlier, after a gap
+        ]
+        completions = [Completion(habit_id=1, completed_at=d) for d in dates]
+        
+        assert analytics_service.calculate_streak(completions, WEEKLY, end_date) == 2
+        assert analytics_service.calculate_longest_streak(completions, WEEKLY) == 2
+    
+    def test_calculate_streaks_matches_separate_functions(self):
+        """Test that the fused calculation returns (current, longest) in one call."""
+        end_date = datetime(2023, 11, 15, 12, 0)
+        offsets = [0, 1, 2, 5, 6, 7, 8, 9, 30]
+        completions = [Completion(habit_id=1, completed_at=end_date - timedelta(days=o)) for o in offsets]
+        
+        assert analytics_service.calculate_streaks(completions, DAILY, end_date) == (3, 5)
+        assert analytics_service.calculate_streaks(completions[3:], DAILY, end_date) == (0, 5)
+        assert analytics_service.calculate_streaks([], WEEKLY) == (0, 0)
+        for periodicity in Periodicity:
+            assert analytics_service.calculate_streaks(completions, periodicity, end_date) == (
+                analytics_service.calculate_streak(completions, periodicity, end_date),
+                analytics_service.calculate_longest_streak(completions, periodicity),
+            )
+    
+    def test_longest_streak_over_a_wide_date_range(self):
+        """Test that histories too wide for the bitset give the same result."""
+        start = datetime(2000, 1, 1, 9, 0)
+        offsets = [0, 1, 2, 3, 4000, 4001, 20000]
+        completions = [Completion(habit_id=1, completed_at=start + timedelta(days=o)) for o in offsets]
+        
+        assert analytics_service.calculate_longest_streak(completions, DAILY) == 4
+        assert analytics_service.calculate_longest_streak(completions[:6], DAILY) == 4
+        assert analytics_service.calculate_longest_streak(completions[4:], DAILY) == 2
+    
+    def test_longest_run_for_every_run_length(self):
+        """Test the bitset search, doubling and binary steps, for run lengths up to 64."""
+        for length in range(1, 65):
+            # A two-period run before and a lone period after the measured run
+            periods = {0, 1} | set(range(10, 10 + length)) | {length + 20}
+            assert analytics_service._longest_run(periods) == max(length, 2)
+    
+    def test_statistics_use_the_given_time(self, habit_with_completions):
+        """Test that passing now pins streaks and windows to that moment."""
+        habit, completions = habit_with_completions
+        later = max(c.completed_at for c in completions) + timedelta(days=30)
+        
+        stats = analytics_service.get_habit_statistics(habit, now=later)
+        summary = analytics_service.get_recent_activity_summary(days=7, now=later)
+        
+        assert stats['current_streak'] == 0
+        assert stats['recent_completions'] == 0
+        assert stats['longest_streak'] == 7
+        assert summary['total_completions'] == 0
+        assert summary['habit_activity'][0]['current_streak'] == 0
+    
     def test_get_habit_statistics(self, habit_with_completions):
         """Test getting comprehensive habit statistics."""
         habit, completions = habit_with_completions
@@ -160,3 +258,34 @@ class TestAnalyticsService:
         
         assert best_habit is None
         assert max_streak == 0
+    
+    def test_find_longest_streak_habit_returns_habit(self, habit_with_completions):
+        """Test that the champion habit is returned with its periodicity."""
+        habit, completions = habit_with_completions
+        HabitService.create_habit("Habit Without Data", periodicity=WEEKLY)
+        
+        best_habit, max_streak = analytics_service.find_longest_streak_habit()
+        
+        assert best_habit.id == habit.id
+        assert best_habit.periodicity == habit.periodicity
+        assert max_streak == analytics_service.calculate_longest_streak(completions, habit.periodicity)
+    
+    def test_get_all_habits_statistics_matches_per_habit(self, habit_with_completions):
+        """Test that batched statistics agree with per-habit statistics."""
+        habit, completions = habit_with_completions
+        HabitService.create_habit("Habit Without Data", periodicity=WEEKLY)
+        
+        all_stats = analytics_service.get_all_habits_statistics()
+        
+        assert len(all_stats) == 2
+        batched = next(s for s in all_stats if s['habit_id'] == habit.id)
+        single = analytics_service.get_habit_statistics(habit)
+        for key in ('total_completions', 'current_streak', 'longest_streak',
+                    'first_completion', 'last_completion', 'completion_rate',
+                    'recent_completions'):
+            assert batched[key] == single[key]
+        
+        empty = next(s for s in all_stats if s['habit_name'] == "Habit Without Data")
+        assert empty['total_completions'] == 0
+        assert empty['current_streak'] == 0
+        assert empty['last_completion'] is None
@@ -10,6 +10,7 @@ from datetime import datetime, timedelta
 from habit_tracker.utils.date_helpers import (
     get_week_start,
     get_week_end,
+    get_week_end_date,
     is_same_week,
     days_between,
     get_date_range,
@@ -40,6 +41,24 @@ class TestDateHelpers:
         # Should return Sunday November 19, 2023 at 23:59:59
         expected = datetime(2023, 11, 19, 23, 59, 59)
         assert week_end == expected
+        assert get_week_end_date(wednesday) == expected.date()
+        assert get_week_end_date(expected.date()) == expected.date()
+    
+    def test_week_bounds_for_every_weekday(self):
+        """Test that every day of a week maps to the same Monday and Sunday."""
+        # Expected bounds precomputed once from the Monday's ordinal
+        monday_ordinal = datetime(2023, 11, 13).toordinal()
+        expected_start = datetime.fromordinal(monday_ordinal)
+        expected_end = datetime.fromordinal(monday_ordinal + 6).replace(hour=23, minute=59, second=59)
+        
+        for offset in range(7):
+            day = datetime.fromordinal(monday_ordinal + offset).replace(hour=offset * 3)
+            assert get_week_start(day) == expected_start
+            assert get_week_end(day) == expected_end
+            assert is_same_week(day, expected_start) is True
+        
+        # The second after Sunday 23:59:59 starts the next week
+        assert is_same_week(expected_end + timedelta(seconds=1), expected_start) is False
     
     def test_is_same_week_true(self):
         """Test that dates in the same week return True."""
@@ -77,10 +96,7 @@ class TestDateHelpers:
         
         date_range = get_date_range(start, end)
         
-        assert len(date_range) == 3
-        assert date_range[0].date() == start.date()
-        assert date_range[1].date() == (start + timedelta(days=1)).date()
-        assert date_range[2].date() == end.date()
+        assert date_range == [start + timedelta(days=i) for i in range(3)]
     
     def test_format_date_for_display(self):
         """Test formatting date for display."""